@@ -0,0 +1,89 @@
+"""
+Benchmarks of the file readers, see conftest.py for the options.
+
+    python -m pytest benchmarks/bench_readers.py --bench-scales=1,10
+
+The vectorized decoders are benchmarked next to the scalar ones they
+replaced and checked to give the same result.
+"""
+import struct
+
+import numpy as np
+import pytest
+
+import binary_parser as bp
+import binary_parser.helper.parser_hplc as ph
+import binary_parser.helper.parser_ms as pm
+import binary_parser.openlab as ol
+
+
+# Scalar decoder as it was before the NumPy path, kept for comparison
+def _read_cycle_scalar(buf, start, cycle_size):
+    data_u16 = []
+    for i in range(cycle_size * 2):
+        data_u16.append(struct.unpack(">H", buf[start + i * 2:start + i * 2 + 2])[0])
+    n = len(data_u16)
+    n -= n % 2
+    mz = np.zeros(n // 2, dtype=float)
+    intensity = np.zeros(n // 2, dtype=float)
+    for i in range(n):
+        if (i & 1) == 0:
+            mz[i >> 1] = data_u16[i] / 20.0
+        else:
+            head = data_u16[i] >> 14
+            tail = data_u16[i] & 0x3FFF
+            intensity[i >> 1] = (8 ** head) * tail
+    return mz, intensity
+
+
+def test_read_cycles(bench, data):
+    bench(pm.read_cycles, data.ms())
+
+
+def test_read_cycles_scalar(bench, data, scale, monkeypatch):
+    if scale > 1:
+        pytest.skip("the scalar decoder only runs on the bundled data")
+    fast = pm.read_cycles(data.ms())
+    monkeypatch.setattr(pm, "_read_cycle", _read_cycle_scalar)
+    for a, b in zip(fast, pm.read_cycles(data.ms())):
+        assert np.array_equal(a["mz"], b["mz"])
+        assert np.array_equal(a["intensity"], b["intensity"])
+    bench(pm.read_cycles, data.ms())
+
+
+def test_read_chemstation_file(bench, data):
+    bench(bp.read_chemstation_file, data.ms())
+
+
+def test_delta_compression(bench, data):
+    bench(ph.DeltaCompression, data.ch(), 0x1800)
+
+
+def test_decode_delta_compression(bench, data):
+    expected = ph.DeltaCompression(data.ch(), 0x1800)
+    assert np.array_equal(ph.decode_delta_compression(data.ch(), 0x1800), expected)
+    bench(ph.decode_delta_compression, data.ch(), 0x1800)
+
+
+def test_uv_class(bench, data):
+    bench(ph.UVClass, data.uv())
+
+
+def test_decode_uv(bench, data):
+    assert np.array_equal(ph.decode_uv(data.uv())[2], ph.UVClass(data.uv()).getData())
+    bench(ph.decode_uv, data.uv())
+
+
+def test_read_chromatograms(bench, data):
+    path = data.run()
+    bench(bp.read_chromatograms, path, files=data.files(path, ".ch"))
+
+
+def test_read_lc(bench, data):
+    path = data.lc()
+    bench(ol.read_lc, path, files=data.files(path, "DAD"))
+
+
+def test_read_ms(bench, data):
+    path = data.spectra()
+    bench(ol.read_ms, path, files=data.files(path, "_spectra"))
@@ -0,0 +1,209 @@
+"""
+Fixtures of the benchmark suite, run it with
+
+    python -m pytest benchmarks/bench_readers.py
+
+Every benchmark runs on the bundled test data and on synthetic files scaled
+to 10x and 100x (--bench-scales). Time per MB and peak memory are printed
+at the end; --bench-save stores the results and --bench-compare fails
+benchmarks that got slower than --bench-max-slowdown times the saved run.
+"""
+import json
+import os
+import shutil
+import time
+import tracemalloc
+
+import netCDF4 as nc
+import numpy as np
+import pytest
+
+import binary_parser.helper.synthetic as sy
+
+_results = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-scales", default="1,10,100",
+                    help="comma separated size factors of the synthetic data")
+    group.addoption("--bench-rounds", type=int, default=3,
+                    help="repetitions per benchmark, the fastest one is reported")
+    group.addoption("--bench-save", default=None, help="write the results to this JSON file")
+    group.addoption("--bench-compare", default=None, help="JSON file of a previous run")
+    group.addoption("--bench-max-slowdown", type=float, default=1.5,
+                    help="allowed slowdown against --bench-compare")
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption("--bench-scales").split(",")]
+        metafunc.parametrize("scale", scales, ids=[f"x{s}" for s in scales], scope="session")
+
+
+class Bench:
+    """Time a reader on an input and record time per MB and peak memory."""
+
+    def __init__(self, config, name):
+        self.config = config
+        self.name = name
+
+    def __call__(self, func, path, *args, files=None, **kwargs):
+        """
+        Run func(path, *args, **kwargs); files are the inputs read by func
+        for the time per MB, path by default.
+        """
+        rounds = self.config.getoption("--bench-rounds")
+        seconds = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func(path, *args, **kwargs)
+            seconds.append(time.perf_counter() - start)
+            if sum(seconds) > 10:
+                break
+
+        tracemalloc.start()
+        try:
+            func(path, *args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        mb = sum(os.path.getsize(f) for f in (files or [path])) / 1e6
+        result = {"name": self.name, "mb": mb, "seconds": min(seconds), "peak_mb": peak / 1e6}
+        _results.append(result)
+        self._compare(result)
+        return result
+
+    def _compare(self, result):
+        baseline_file = self.config.getoption("--bench-compare")
+        if baseline_file is None:
+            return
+        with open(baseline_file, encoding="utf-8") as f:
+            baseline = {r["name"]: r for r in json.load(f)}
+        if result["name"] not in baseline:
+            return
+        slowdown = result["seconds"] / baseline[result["name"]]["seconds"]
+        result["slowdown"] = slowdown
+        if slowdown > self.config.getoption("--bench-max-slowdown"):
+            pytest.fail(f"{result['name']} is {slowdown:.2f}x slower than the saved run")
+
+
+@pytest.fixture
+def bench(request):
+    return Bench(request.config, request.node.name)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not _results:
+        return
+    tr = terminalreporter
+    tr.section("benchmarks")
+    tr.write_line(f"{'name':<48} {'MB':>9} {'s':>9} {'ms/MB':>9} {'MB/s':>9} {'peak MB':>9}")
+    for r in _results:
+        line = (
+            f"{r['name']:<48} {r['mb']:>9.2f} {r['seconds']:>9.4f} "
+            f"{r['seconds'] * 1000 / r['mb']:>9.2f} {r['mb'] / r['seconds']:>9.1f} "
+            f"{r['peak_mb']:>9.1f}"
+        )
+        if "slowdown" in r:
+            line += f"  {r['slowdown']:.2f}x"
+        tr.write_line(line)
+    save = config.getoption("--bench-save")
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump(_results, f, indent=2)
+
+
+# Synthetic data from binary_parser.helper.synthetic sized like the bundled
+# files times scale, OpenLab DAD files are tiled copies of the bundled ones
+
+
+def tile_lc(src, dst, scale):
+    """Copy an OpenLab DAD file with its signal repeated."""
+    with nc.Dataset(src) as source, nc.Dataset(dst, "w") as target:
+        target.setncatts({key: source.getncattr(key) for key in source.ncattrs()})
+        signal = np.tile(source.variables["ordinate_values"][:], scale)
+        target.createDimension("point_number", len(signal))
+        target.createVariable("ordinate_values", "f4", ("point_number",))[:] = signal
+        run_time = source.variables["actual_run_time_length"]
+        target.createVariable("actual_run_time_length", run_time.dtype, ())[...] = (
+            run_time[...] * scale
+        )
+
+
+class Data:
+    """Paths of the benchmark inputs at one scale, created on first use."""
+
+    ms_file = "./tests/Chemstation/SVS_1025F1.D/MSD1.MS"
+    run_dir = "./tests/X3346.D"
+    lc_dir = "./tests/OpenLab"
+
+    def __init__(self, tmp_dir, scale):
+        self.tmp_dir = str(tmp_dir)
+        self.scale = scale
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    @staticmethod
+    def files(path, pattern):
+        """Files in the folder path whose name contains pattern."""
+        return [os.path.join(path, f) for f in sorted(os.listdir(path)) if pattern in f]
+
+    def ms(self):
+        if self.scale == 1:
+            return self.ms_file
+        dst = self._path("MSD1.MS")
+        if not os.path.exists(dst):
+            sy.generate_ms_file(dst, cycles=465 * self.scale, points=400)
+        return dst
+
+    def ch(self):
+        return os.path.join(self.run(), "dad1A.ch")
+
+    def uv(self):
+        return os.path.join(self.run(), "dad1.uv")
+
+    def run(self):
+        """.D folder with the .ch files and the .uv file."""
+        if self.scale == 1:
+            return self.run_dir
+        dst = self._path("run.D")
+        if not os.path.exists(dst):
+            os.makedirs(dst)
+            for i, signal in enumerate((210, 230, 254, 280, 366)):
+                sy.generate_ch_file(os.path.join(dst, f"dad1{'ABCDE'[i]}.ch"),
+                                    points=3451 * self.scale, signal=signal, seed=i)
+            sy.generate_uv_file(os.path.join(dst, "dad1.uv"), scans=3443 * self.scale)
+        return dst
+
+    def lc(self):
+        if self.scale == 1:
+            return self.lc_dir
+        dst = self._path("lc")
+        if not os.path.exists(dst):
+            os.makedirs(dst)
+            for name in sorted(os.listdir(self.lc_dir)):
+                if "DAD" in name:
+                    tile_lc(os.path.join(self.lc_dir, name), os.path.join(dst, name), self.scale)
+        return dst
+
+    def spectra(self):
+        """OpenLab folder with a positive and a negative spectra file."""
+        dst = self._path("spectra")
+        if not os.path.exists(dst):
+            os.makedirs(dst)
+            scans = 200 * self.scale
+            sy.generate_spectra_file(self._path("spectra/run_MS1_spectra.cdf"), scans, 400,
+                                     "Positive Polarity", seed=1)
+            sy.generate_spectra_file(self._path("spectra/run_MS2_spectra.cdf"), scans, 400,
+                                     "Negative Polarity", seed=2)
+        return dst
+
+
+@pytest.fixture(scope="session")
+def data(tmp_path_factory, scale):
+    tmp_dir = tmp_path_factory.mktemp(f"x{scale}")
+    yield Data(tmp_dir, scale)
+    shutil.rmtree(tmp_dir, ignore_errors=True)
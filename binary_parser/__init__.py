@@ -1,5 +1,45 @@
-from binary_parser.hplc import read_chromatograms, plot_chromatograms
-from binary_parser.chemstation import read_chemstation_file
-from binary_parser.openlab import read_attr, read_lc, read_ms
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["read_chromatograms", "plot_chromatograms", "read_chemstation_file"]
+if TYPE_CHECKING:
+    from binary_parser.chemstation import read_chemstation_file
+    from binary_parser.helper.cache import disable_cache, enable_cache
+    from binary_parser.hplc import plot_chromatograms, read_chromatograms
+    from binary_parser.openlab import read_attr, read_lc, read_ms
+
+# Readers are imported on first use, so `import binary_parser` does not load
+# pandas, plotly or netCDF4
+_exports = {
+    "read_chromatograms": "binary_parser.hplc",
+    "plot_chromatograms": "binary_parser.hplc",
+    "read_chemstation_file": "binary_parser.chemstation",
+    "read_attr": "binary_parser.openlab",
+    "read_lc": "binary_parser.openlab",
+    "read_ms": "binary_parser.openlab",
+    "enable_cache": "binary_parser.helper.cache",
+    "disable_cache": "binary_parser.helper.cache",
+}
+
+_submodules = {"chemstation", "cli", "export", "helper", "hplc", "openlab", "xray"}
+
+__all__ = [
+    "read_chromatograms",
+    "plot_chromatograms",
+    "read_chemstation_file",
+    "enable_cache",
+    "disable_cache",
+]
+
+
+def __getattr__(name):
+    if name in _exports:
+        value = getattr(importlib.import_module(_exports[name]), name)
+        globals()[name] = value
+        return value
+    if name in _submodules:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports) | _submodules)
@@ -1,6 +1,7 @@
 
-from binary_parser.chemstation.read_ms_file import read_chemstation_file
+from binary_parser.chemstation.read_ms_file import read_chemstation_file, read_chemstation_arrays
 
 __all__ = [
     'read_chemstation_file',
+    'read_chemstation_arrays',
 ]
@@ -1,6 +1,8 @@
 import binary_parser.helper.parser_ms as pm
 import pandas as pd
 
+from binary_parser.helper.cache import cached
+
 from typing import List
 
 
@@ -28,6 +30,33 @@ def merge_cycles_into_df(cycles: List[dict]) -> pd.DataFrame:
 
 
 
+def cycle_table_to_df(table: pm.CycleTable) -> pd.DataFrame:
+    """Build the long-format DataFrame of all cycles in one step."""
+    return pd.DataFrame({
+        "mz": table.mz,
+        "intensity": table.intensity,
+        "retention_time": table.point_retention_time(),
+        "cycle_id": table.cycle_ids(),
+    })
+
+
+
+def read_chemstation_arrays(file_path: str) -> pm.CycleTable:
+    """Read a Chemstation LC-MS file into flat mz/intensity arrays with cycle offsets."""
+    def decode():
+        table = pm.read_cycle_table(file_path)
+        return {
+            "mz": table.mz,
+            "intensity": table.intensity,
+            "cycle_offsets": table.cycle_offsets,
+            "retention_time": table.retention_time,
+        }
+    arrays = cached(file_path, "chemstation", decode)
+    return pm.CycleTable(
+        arrays["mz"], arrays["intensity"], arrays["cycle_offsets"], arrays["retention_time"]
+    )
+
+
+
 def read_chemstation_file(file_path: str) -> pd.DataFrame:
-    cycles = pm.read_cycles(file_path)
-    return merge_cycles_into_df(cycles)
+    return cycle_table_to_df(read_chemstation_arrays(file_path))
@@ -0,0 +1,135 @@
+"""
+binary-parser command line tool: converts every supported instrument file
+below a directory to Parquet or Arrow IPC.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+
+from binary_parser.export import FORMATS, convert
+
+# (input path, output path, input files)
+Job = Tuple[str, str, List[str]]
+
+_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "feather": ".feather"}
+
+
+def find_jobs(root: str, out_dir: str, format: str = "parquet") -> Iterator[Job]:
+    """
+    Walk root and yield one conversion job per supported input: a folder
+    with .ch files, a .uv, MS, .cdf or .raw file. Outputs mirror the tree
+    below root in out_dir.
+    """
+    # pylint: disable=redefined-builtin
+    ext = _EXTENSIONS[format]
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        rel = os.path.relpath(dirpath, root)
+        target = os.path.normpath(os.path.join(out_dir, rel))
+        ch_files = sorted(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(".ch"))
+        if ch_files:
+            yield dirpath, os.path.join(target, "chromatograms" + ext), ch_files
+        for name in sorted(filenames):
+            if name.lower().endswith((".uv", ".ms", ".cdf", ".raw")):
+                path = os.path.join(dirpath, name)
+                yield path, os.path.join(target, name + ext), [path]
+
+
+def is_up_to_date(job: Job) -> bool:
+    """True if the output of job exists and is newer than all its inputs."""
+    _, out, files = job
+    try:
+        out_mtime = os.path.getmtime(out)
+    except OSError:
+        return False
+    return all(os.path.getmtime(f) <= out_mtime for f in files)
+
+
+def _run_job(job: Job, format: str, chunk: int) -> Tuple[str, int]:
+    # pylint: disable=redefined-builtin
+    path, out, files = job
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    kind = convert(path, out, format=format, chunk=chunk)
+    return kind, sum(os.path.getsize(f) for f in files)
+
+
+def run(root: str, out_dir: str, format: str = "parquet", workers: Optional[int] = None,
+        chunk: int = 256, force: bool = False, log=sys.stderr) -> dict:
+    """
+    Convert all inputs below root and return counts of converted, skipped
+    and failed inputs together with the converted bytes and elapsed time.
+    Every worker converts one input at a time and MS data is streamed in
+    batches of chunk cycles, so memory stays bounded by the largest
+    chromatogram or UV file.
+    """
+    # pylint: disable=redefined-builtin,too-many-arguments,too-many-locals
+    jobs = list(find_jobs(root, out_dir, format))
+    todo = jobs if force else [job for job in jobs if not is_up_to_date(job)]
+    stats = {"converted": 0, "skipped": len(jobs) - len(todo), "failed": 0, "bytes": 0}
+
+    def done(job, result=None, error=None):
+        if error is None:
+            stats["converted"] += 1
+            stats["bytes"] += result[1]
+        else:
+            stats["failed"] += 1
+            print(f"failed: {job[0]}: {error}", file=log)
+
+    start = time.perf_counter()
+    if workers is None or workers == 1 or len(todo) < 2:
+        for job in todo:
+            try:
+                done(job, _run_job(job, format, chunk))
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                done(job, error=ex)
+    else:
+        max_workers = os.cpu_count() if workers == -1 else workers
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(todo))) as pool:
+            futures = {pool.submit(_run_job, job, format, chunk): job for job in todo}
+            for future in as_completed(futures):
+                try:
+                    done(futures[future], future.result())
+                except Exception as ex:  # pylint: disable=broad-exception-caught
+                    done(futures[future], error=ex)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def format_stats(stats: dict) -> str:
+    seconds = max(stats["seconds"], 1e-9)
+    return (
+        f"{stats['converted']} converted, {stats['skipped']} skipped, "
+        f"{stats['failed']} failed in {stats['seconds']:.1f} s "
+        f"({stats['converted'] / seconds:.1f} files/s, "
+        f"{stats['bytes'] / seconds / 1e6:.1f} MB/s)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="binary-parser",
+        description="Convert Chemstation, OpenLab and Bruker files to Parquet or Arrow.",
+    )
+    parser.add_argument("input", help="directory to search for instrument files")
+    parser.add_argument("output", help="directory for the converted files")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="parquet")
+    parser.add_argument("-j", "--workers", type=int, default=-1,
+                        help="number of worker processes, -1 for all cores (default)")
+    parser.add_argument("--chunk", type=int, default=256,
+                        help="MS cycles/scans per record batch (default 256)")
+    parser.add_argument("--force", action="store_true",
+                        help="convert inputs even if their output is up to date")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        parser.error(f"{args.input} is not a directory")
+    stats = run(args.input, args.output, args.format, args.workers, args.chunk, args.force)
+    print(format_stats(stats))
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
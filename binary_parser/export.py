@@ -0,0 +1,251 @@
+"""
+Conversion of decoded instrument files to Parquet or Arrow IPC (Feather).
+Data is written as record batches while decoding, so large MS files are
+converted without building a DataFrame of the whole run.
+"""
+import json
+import os
+from typing import Iterator, Optional
+
+import numpy as np
+
+FORMATS = ("parquet", "arrow", "feather")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as ex:
+        raise ImportError(
+            "Exporting requires pyarrow, install it with 'pip install BinaryParser[export]'"
+        ) from ex
+    return pa, pq
+
+
+def detect_format(path: str) -> Optional[str]:
+    """
+    Kind of input for path: "chemstation_ms", "uv", "chromatograms" (.D folder
+    with .ch files), "openlab_ms", "openlab_lc", "openlab" (OpenLab folder with
+    DAD and spectra files), "xray" or None if unknown.
+    """
+    name = os.path.basename(os.path.normpath(path)).lower()
+    if os.path.isdir(path):
+        files = os.listdir(path)
+        if any(f.lower().endswith(".ch") for f in files):
+            return "chromatograms"
+        # DAD and spectra files as selected by openlab.read_lc and read_ms
+        cdf = [f for f in files if f.lower().endswith(".cdf")]
+        has_lc = any("DAD" in f for f in cdf)
+        has_ms = any("_spectra" in f for f in cdf)
+        if has_lc and has_ms:
+            return "openlab"
+        if has_ms:
+            return "openlab_ms"
+        return "openlab_lc" if has_lc else None
+    if name.endswith(".ms"):
+        return "chemstation_ms"
+    if name.endswith(".uv"):
+        return "uv"
+    if name.endswith(".cdf"):
+        return "openlab_ms" if "spectra" in name else "openlab_lc"
+    if name.endswith(".raw"):
+        return "xray"
+    return None
+
+
+def ms_output(out: str) -> str:
+    """Output path of the spectra files of an "openlab" folder converted to out."""
+    root, ext = os.path.splitext(out)
+    return f"{root}_ms{ext}"
+
+
+def _json_value(value):
+    if isinstance(value, dict):
+        return {k: _json_value(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _metadata(path: str, kind: str, attrs: Optional[dict] = None) -> dict:
+    meta = {"source": os.path.abspath(path), "format": kind}
+    if attrs:
+        meta["attributes"] = {k: _json_value(v) for k, v in attrs.items()}
+    return {b"binary_parser": json.dumps(meta, default=str).encode("utf-8")}
+
+
+# Record batches per input kind
+
+
+def _chemstation_batches(pa, path: str, chunk: int) -> Iterator:
+    import binary_parser.helper.parser_ms as pm
+
+    first_cycle = 0
+    for table in pm.iter_cycles(path, chunk_cycles=chunk):
+        yield pa.record_batch({
+            "mz": table.mz,
+            "intensity": table.intensity,
+            "retention_time": table.point_retention_time(),
+            "cycle_id": table.cycle_ids() + first_cycle,
+        })
+        first_cycle += len(table)
+
+
+def _openlab_ms_batches(pa, path: str, chunk: int, polarity: Optional[str] = None) -> Iterator:
+    """Batches of a spectra file; polarity adds a column to tell files of a folder apart."""
+    from binary_parser.openlab.openlab import iter_ms_scans
+
+    first_scan = 0
+    for scans in iter_ms_scans(path, scans_per_chunk=chunk):
+        batch = {
+            "mz": scans.mz,
+            "intensities": scans.intensities,
+            "time": np.repeat(scans.time, scans.point_counts()),
+            "scan_id": np.repeat(np.arange(len(scans)), scans.point_counts()) + first_scan,
+        }
+        if polarity is not None:
+            batch["polarity"] = np.full(len(scans.mz), polarity)
+        yield pa.record_batch(batch)
+        first_scan += len(scans)
+
+
+def _openlab_folder_files(path: str, pattern: str) -> list:
+    from binary_parser.openlab.openlab import get_files
+    return [f for f in get_files(path) if pattern in os.path.basename(f)]
+
+
+def _openlab_attrs(files: list) -> dict:
+    """Global attributes of every file, keyed by file name."""
+    from binary_parser.openlab.openlab import _get_attr
+    return {os.path.basename(f): _get_attr(f) for f in files}
+
+
+def _matrix_batches(pa, time: np.ndarray, labels, columns, chunk: int) -> Iterator:
+    """Rows of a time x signal matrix given as one array per column."""
+    for start in range(0, max(len(time), 1), chunk):
+        stop = start + chunk
+        batch = {"time": time[start:stop]}
+        for label, column in zip(labels, columns):
+            batch[label] = column[start:stop]
+        yield pa.record_batch(batch)
+
+
+def _batches(pa, path: str, kind: str, chunk: int):
+    """Record batch iterator and schema metadata for path."""
+    if kind == "chemstation_ms":
+        return _chemstation_batches(pa, path, chunk), _metadata(path, kind)
+
+    if kind == "openlab_ms":
+        if not os.path.isdir(path):
+            from binary_parser.openlab.openlab import _get_attr
+            return _openlab_ms_batches(pa, path, chunk), _metadata(path, kind, _get_attr(path))
+        from binary_parser.openlab.openlab import ms_polarity
+        files = _openlab_folder_files(path, "_spectra")
+        batches = (
+            batch for f in files
+            for batch in _openlab_ms_batches(pa, f, chunk, ms_polarity(f) or os.path.basename(f))
+        )
+        return batches, _metadata(path, kind, _openlab_attrs(files))
+
+    if kind == "uv":
+        from binary_parser.hplc.read_files import read_uv_arrays
+        time, wavelengths, data = read_uv_arrays(path)
+        labels = ["Wavelength_" + str(w) for w in wavelengths.astype("int").tolist()]
+        return _matrix_batches(pa, time, labels, data.T, chunk * 16), _metadata(path, kind)
+
+    if kind == "chromatograms":
+        from binary_parser.hplc.read_files import read_chromatogram_arrays
+        time, labels, data = read_chromatogram_arrays(path)
+        return _matrix_batches(pa, time, labels, data, chunk * 16), _metadata(path, kind)
+
+    if kind == "openlab_lc":
+        from binary_parser.openlab.openlab import _get_attr, get_lc_data, process_detector_info
+        if os.path.isdir(path):
+            files = _openlab_folder_files(path, "DAD")
+            attrs = _openlab_attrs(files)
+        else:
+            files = [path]
+            attrs = _get_attr(path)
+        batches = (
+            pa.RecordBatch.from_pandas(process_detector_info([get_lc_data(f)])[0], preserve_index=False)
+            for f in files
+        )
+        return batches, _metadata(path, kind, attrs)
+
+    if kind == "xray":
+        from binary_parser.xray.bruker_xray import read_raw, read_raw_index
+        index = read_raw_index(path)
+        batches = (
+            pa.record_batch({
+                "two_theta": raw_range.two_theta(),
+                "intensity": np.asarray(read_raw(path, i), dtype=np.float32),
+                "range_id": np.full(raw_range.steps, i, dtype=np.int32),
+            })
+            for i, raw_range in enumerate(index.ranges)
+        )
+        attrs = {"version": index.version, "wl1": index.wl1, "wl2": index.wl2}
+        return batches, _metadata(path, kind, attrs)
+
+    raise ValueError(f"Unsupported input: {path}")
+
+
+def _write(pa, pq, batches, metadata: dict, tmp: str, format: str, path: str):
+    """Write the batches decoded from path to tmp, which is removed on failure."""
+    # pylint: disable=redefined-builtin
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                schema = batch.schema.with_metadata(metadata)
+                writer = (pq.ParquetWriter(tmp, schema) if format == "parquet"
+                          else pa.ipc.new_file(tmp, schema))
+            writer.write_batch(batch.replace_schema_metadata(metadata))
+        if writer is None:
+            raise ValueError(f"No data found in {path}")
+        writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def convert(path: str, out: str, format: str = "parquet", chunk: int = 256) -> str:
+    """
+    Decode path (MSD1.MS, .uv, .D folder, OpenLab .cdf/folder or Bruker .raw)
+    and write it to out as Parquet ("parquet") or Arrow IPC ("arrow"/"feather").
+    MS data is written in record batches of chunk cycles/scans. The spectra
+    files of an OpenLab folder are written to one table with a polarity
+    column; if the folder also holds DAD files that table goes to
+    ms_output(out) and the LC signals to out.
+    Returns the detected input kind.
+    """
+    # pylint: disable=redefined-builtin
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format}, use one of {FORMATS}")
+    kind = detect_format(path)
+    if kind is None:
+        raise ValueError(f"Unsupported input: {path}")
+
+    pa, pq = _pyarrow()
+    if kind == "openlab":
+        outputs = [(out, "openlab_lc"), (ms_output(out), "openlab_ms")]
+    else:
+        outputs = [(out, kind)]
+    written = []
+    try:
+        for target, target_kind in outputs:
+            batches, metadata = _batches(pa, path, target_kind, chunk)
+            _write(pa, pq, batches, metadata, target + ".tmp", format, path)
+            written.append(target)
+    except BaseException:
+        for target in written:
+            os.remove(target + ".tmp")
+        raise
+    for target in written:
+        os.replace(target + ".tmp", target)
+    return kind
@@ -0,0 +1,122 @@
+import glob
+import hashlib
+import os
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# Bump when a reader changes its decoded output, old entries are then ignored
+PARSER_VERSION = "1"
+
+Arrays = Dict[str, np.ndarray]
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+
+
+class DecodeCache:
+    """
+    On-disk cache of decoded arrays stored as .npz files. Entries are keyed
+    by file path, size, mtime, reader and parser version; the least recently
+    used entries are evicted when the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _prefix(self, path: str) -> str:
+        return _hash(os.path.abspath(path))
+
+    def _entry(self, path: str, kind: str) -> str:
+        st = os.stat(path)
+        fingerprint = f"{st.st_size}|{st.st_mtime_ns}|{kind}|{PARSER_VERSION}"
+        return os.path.join(self.directory, f"{self._prefix(path)}-{_hash(fingerprint)}.npz")
+
+    def load(self, path: str, kind: str) -> Optional[Arrays]:
+        entry = self._entry(path, kind)
+        try:
+            with np.load(entry, allow_pickle=False) as data:
+                arrays = {key: data[key] for key in data.files}
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(entry)  # mark as recently used
+        except OSError:
+            pass  # evicted by another process since it was loaded
+        return arrays
+
+    def store(self, path: str, kind: str, arrays: Arrays):
+        entry = self._entry(path, kind)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, entry)
+        self._evict()
+
+    def invalidate(self, path: Optional[str] = None):
+        """Remove the entries of path, or all entries if path is None."""
+        prefix = "*" if path is None else self._prefix(path)
+        for entry in glob.glob(os.path.join(self.directory, f"{prefix}-*.npz")):
+            os.remove(entry)
+
+    def _evict(self):
+        entries = []
+        for entry in glob.glob(os.path.join(self.directory, "*.npz")):
+            try:
+                st = os.stat(entry)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+            total -= size
+
+
+_cache: Optional[DecodeCache] = None
+
+
+def enable_cache(directory: str, max_bytes: int = 1 << 30) -> DecodeCache:
+    """Cache decoded files in directory for all readers of the package."""
+    global _cache
+    _cache = DecodeCache(directory, max_bytes)
+    return _cache
+
+
+def disable_cache():
+    global _cache
+    _cache = None
+
+
+def get_cache() -> Optional[DecodeCache]:
+    return _cache
+
+
+def init_worker(directory: Optional[str], max_bytes: int = 1 << 30):
+    """
+    Process pool initializer: enable the cache of the parent process, which
+    spawn and forkserver workers do not inherit.
+    """
+    if directory is None:
+        disable_cache()
+    else:
+        enable_cache(directory, max_bytes)
+
+
+def cached(path: str, kind: str, decode: Callable[[], Arrays]) -> Arrays:
+    """Arrays of path decoded by decode, served from the cache if enabled."""
+    if _cache is None:
+        return decode()
+    arrays = _cache.load(path, kind)
+    if arrays is None:
+        arrays = decode()
+        _cache.store(path, kind, arrays)
+    return arrays
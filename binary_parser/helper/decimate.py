@@ -0,0 +1,77 @@
+"""
+Downsampling of traces and surfaces for plotting within a point budget.
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of the points kept by min/max decimation: y is split into
+    max_points // 2 buckets and the minimum and maximum of every bucket are
+    kept in their original order, so peaks survive the downsampling.
+    NaN values are ignored.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(max_points // 2, 1)
+    size = math.ceil(n / buckets)
+    buckets = math.ceil(n / size)
+
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    valid = ~np.isnan(padded).all(axis=1)
+    padded[~valid] = 0.0  # all-NaN buckets, dropped below
+    first = np.arange(buckets) * size
+    lo = first + np.nanargmin(padded, axis=1)
+    hi = first + np.nanargmax(padded, axis=1)
+    idx = np.sort(np.stack([lo, hi], axis=1)[valid], axis=1).ravel()
+    return np.unique(idx)
+
+
+def decimate_minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """x and y reduced to at most max_points points with min/max decimation."""
+    idx = minmax_indices(y, max_points)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def _block_factors(shape: Tuple[int, int], max_points: int) -> Tuple[int, int]:
+    """Block sizes per axis so that the reduced grid has at most max_points cells."""
+    factors = [1, 1]
+    reduced = list(shape)
+    while reduced[0] * reduced[1] > max_points:
+        axis = 0 if reduced[0] >= reduced[1] else 1
+        factors[axis] += 1
+        reduced[axis] = math.ceil(shape[axis] / factors[axis])
+    return factors[0], factors[1]
+
+
+def _block_mean(values: np.ndarray, factor: int, axis: int) -> np.ndarray:
+    """Mean of consecutive blocks of factor entries along axis, the last block may be shorter."""
+    if factor == 1:
+        return values
+    starts = np.arange(0, values.shape[axis], factor)
+    sums = np.add.reduceat(values, starts, axis=axis)
+    counts = np.diff(np.append(starts, values.shape[axis]))
+    shape = [1] * values.ndim
+    shape[axis] = len(counts)
+    return sums / counts.reshape(shape)
+
+
+def block_reduce(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                 max_points: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Surface z (len(y) x len(x)) averaged over blocks of neighbouring cells so
+    that at most max_points cells remain; the axes are averaged alike.
+    """
+    z = np.asarray(z, dtype=float)
+    fy, fx = _block_factors(z.shape, max_points)
+    z = _block_mean(_block_mean(z, fy, 0), fx, 1)
+    x = _block_mean(np.asarray(x, dtype=float), fx, 0)
+    y = _block_mean(np.asarray(y, dtype=float), fy, 0)
+    return x, y, z
@@ -1,3 +1,4 @@
+import re
 import struct
 import numpy as np
 
@@ -97,6 +98,185 @@ def DeltaCompression(filepath, offset, n=None):
         return np.array(res, dtype=np.int32)
 
 
+_ESCAPE = -32768
+
+
+def _delta_layout(escapes, pos, count, k=0):
+    """
+    Walk count items starting at word pos. An item is either a delta or the
+    escape word followed by an absolute int32 value (three words).
+    escapes are the candidate escape positions, k the first one to look at.
+    Returns the escape positions used, the position after the items and the next k.
+    """
+    end = pos + count
+    used = []
+    while k < len(escapes) and escapes[k] < pos:
+        k += 1
+    while k < len(escapes) and escapes[k] < end:
+        e = escapes[k]
+        used.append(e)
+        end += 2
+        # skip candidates inside the absolute value
+        while k < len(escapes) and escapes[k] < e + 3:
+            k += 1
+    return used, end, k
+
+
+def _gather_items(words, skip, escapes, end, big_endian=True):
+    """
+    Item values and absolute-value mask of words[:end], leaving out the
+    positions in skip (block headers) and the two words after each escape.
+    """
+    escapes = np.asarray(escapes, dtype=np.int64)
+    keep = np.ones(end, dtype=bool)
+    keep[np.asarray(skip, dtype=np.int64)] = False
+    keep[escapes + 1] = False
+    keep[escapes + 2] = False
+
+    values = words[:end].astype(np.int64)
+    values[escapes] = _absolute_values(words, escapes, big_endian)
+    reset = np.zeros(end, dtype=bool)
+    reset[escapes] = True
+    return values[keep], reset[keep]
+
+
+def _absolute_values(words, escapes, big_endian=True):
+    """int32 values stored in the two words after each escape."""
+    hi = words[escapes + 1].astype(np.int64) & 0xFFFF
+    lo = words[escapes + 2].astype(np.int64) & 0xFFFF
+    if not big_endian:
+        hi, lo = lo, hi
+    return ((hi << 16) | lo).astype(np.uint32).view(np.int32)
+
+
+def _accumulate(values, reset, prev=0):
+    """Running sum of the deltas that restarts at every absolute value."""
+    res = np.cumsum(values) + prev
+    if reset.any():
+        starts = np.flatnonzero(reset)
+        before = np.where(starts > 0, res[starts - 1], prev)
+        res -= np.concatenate(([0], before))[np.cumsum(reset)]
+    return res
+
+
+def _decode_delta_blocks(words, prev=0, complete_only=False):
+    """
+    Decode delta compressed blocks. Every block starts with a header word
+    whose lower 12 bits hold the number of items; a zero header ends the data.
+    With complete_only the items of a truncated last block are left out.
+    Returns the decoded values and the word position after the last complete block.
+    """
+    escapes = np.flatnonzero(words == _ESCAPE).tolist()
+    headers = []
+    used = []
+    n = len(words)
+    pos = 0
+    end = 0
+    k = 0
+
+    while pos < n:
+        header = int(words[pos])
+        if header == 0:
+            break
+        headers.append(pos)
+        block_escapes, pos, k = _delta_layout(escapes, pos + 1, header & 4095, k)
+        if pos > n:
+            if complete_only:
+                headers.pop()
+                pos = end
+                break
+            # truncated block: keep the items that were written completely
+            if block_escapes and block_escapes[-1] + 3 > n:
+                pos = block_escapes.pop()
+            else:
+                pos = n
+            used += block_escapes
+            break
+        used += block_escapes
+        end = pos
+
+    values, reset = _gather_items(words, headers, used, pos)
+    return _accumulate(values, reset, prev), end
+
+
+def decode_delta_compression(filepath, offset):
+    """
+    Vectorized equivalent of DeltaCompression: reads the data block once and
+    rebuilds the signal with cumulative sums between absolute values.
+    """
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    words = np.frombuffer(data, dtype=">i2", count=len(data) // 2)
+    res, _ = _decode_delta_blocks(words)
+    return res.astype(np.int32)
+
+
+class ChFile:
+    """
+    Agilent .ch signal file read with a single open. Header fields are parsed
+    once from the buffer; the signal is decoded on request.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self.buf = f.read()
+
+        info = self.buf[0x1080:0x1080 + 40].replace(b"\x00", b"").decode("latin-1")
+        match = re.search(r"Sig=(\d+),", info)
+        if match is None:
+            raise ValueError(f"No signal id found in {filepath}")
+        self.signal: int = int(match.group(1))
+
+        start, stop = struct.unpack_from(">ii", self.buf, 0x11A)
+        self.start_time: float = start / 60000.0
+        self.end_time: float = stop / 60000.0
+
+        self.intercept: float
+        self.slope: float
+        self.intercept, self.slope = struct.unpack_from(">dd", self.buf, 4724)
+
+        self.data_offset: int = 0x1800
+
+    def raw_data(self):
+        """Delta decompressed signal as int32."""
+        words = np.frombuffer(
+            self.buf, dtype=">i2", offset=self.data_offset,
+            count=(len(self.buf) - self.data_offset) // 2,
+        )
+        res, _ = _decode_delta_blocks(words)
+        return res.astype(np.int32)
+
+
+class ChFollower:
+    """
+    Follow a .ch file that is still being acquired. Every poll() decodes only
+    the delta blocks appended since the last poll, continuing from the
+    remembered word offset and running value; a block that is not completely
+    written yet is decoded by a later poll.
+    """
+
+    def __init__(self, filepath, offset=0x1800):
+        self.filepath = filepath
+        self.offset = offset  # file position of the next block
+        self.prev = 0
+        self.points = 0
+
+    def poll(self):
+        """Values of the new complete blocks as int32."""
+        with open(self.filepath, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        words = np.frombuffer(data, dtype=">i2", count=len(data) // 2)
+        res, end = _decode_delta_blocks(words, self.prev, complete_only=True)
+        self.offset += end * 2
+        if len(res):
+            self.prev = int(res[-1])
+            self.points += len(res)
+        return res.astype(np.int32)
+
+
 class UVClass:
     """
     Python-port of UVClass in pybind11 module
@@ -171,6 +351,118 @@ class UVClass:
         return self.ndata
 
 
+def _wavelength_map(wavelengths):
+    # rotate ordering like original C++
+    max_idx = int(np.argmax(wavelengths))
+    return np.array(
+        list(range(max_idx + 1, len(wavelengths))) + list(range(0, max_idx + 1)),
+        dtype=np.int64,
+    )
+
+
+def _find_escapes(words, chunk_words):
+    """Positions of the escape word, searched chunk by chunk to keep the mask small."""
+    found = [
+        np.flatnonzero(words[first:first + chunk_words] == _ESCAPE) + first
+        for first in range(0, len(words), chunk_words)
+    ]
+    return np.concatenate(found).tolist() if found else []
+
+
+def _scan_chunks(scan_map, lengths, chunk_words):
+    """
+    (first, last) ranges of consecutive scans that share a wavelength map
+    and hold about chunk_words words together.
+    """
+    cum = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=cum[1:])
+    run_ends = np.append(np.flatnonzero(np.diff(scan_map)) + 1, len(scan_map))
+    first = 0
+    for run_end in run_ends.tolist():
+        while first < run_end:
+            last = int(np.searchsorted(cum, cum[first] + chunk_words, side="right")) - 1
+            last = min(max(last, first + 1), run_end)
+            yield first, last
+            first = last
+
+
+def decode_uv(filepath, chunk_words=1 << 16):
+    """
+    Vectorized equivalent of UVClass. The file is memory mapped, the wavelength
+    grid is only rebuilt when a scan header introduces new wavelengths and the
+    scans are delta-decoded in chunks of about chunk_words words, so memory
+    beyond the result matrix stays bounded.
+    Returns time, wavelengths and the (scans x wavelengths) data matrix.
+    """
+    buf = np.memmap(filepath, dtype=np.uint8, mode="r")
+    nscans = struct.unpack_from(">i", buf, 0x116)[0]
+    words = buf[:len(buf) // 2 * 2].view("<i2")
+    escapes = _find_escapes(words, chunk_words)
+
+    time = np.zeros(nscans, dtype=float)
+    wavelengths = []
+    known = set()
+    headers = set()
+    maps = []
+    scan_map = np.zeros(nscans, dtype=np.int32)
+    starts = np.zeros(nscans, dtype=np.int64)
+    ends = np.zeros(nscans, dtype=np.int64)
+    used = []
+    k = 0
+
+    offset = 0x1002
+    for scan in range(nscans):
+        size, time_raw, wstart, wstop, wstep = struct.unpack_from("<HIHHH", buf, offset)
+        time[scan] = time_raw / 60000.0
+
+        if (wstart, wstop, wstep) not in headers:
+            headers.add((wstart, wstop, wstep))
+            new = [wv / 20.0 for wv in range(wstart, wstop, wstep) if wv / 20.0 not in known]
+            if new:
+                wavelengths += new
+                known.update(new)
+                maps.append(_wavelength_map(wavelengths))
+
+        if (offset + 12) % 2:
+            # scan data not aligned to the word grid, use the reference decoder
+            uv = UVClass(filepath)
+            return uv.getTime(), uv.getWavelengths(), uv.getData()
+
+        scan_map[scan] = len(maps) - 1
+        starts[scan] = (offset + 12) // 2
+        scan_escapes, ends[scan], k = _delta_layout(escapes, starts[scan], len(wavelengths), k)
+        used += scan_escapes
+        offset += size
+
+    if ends.size and ends.max() > len(words):
+        raise ValueError("Error extracting data")
+
+    used = np.array(used, dtype=np.int64)
+    ndata = np.zeros((nscans, len(wavelengths)), dtype=float)
+    for first, last in _scan_chunks(scan_map, ends - starts, chunk_words):
+        # word positions of the scans back to back, every scan starts from zero
+        lengths = ends[first:last] - starts[first:last]
+        range_offsets = np.cumsum(lengths) - lengths
+        idx = np.repeat(starts[first:last] - range_offsets, lengths) + np.arange(lengths.sum())
+        values = words[idx].astype(np.int64)
+        keep = np.ones(len(idx), dtype=bool)
+        reset = np.zeros(len(idx), dtype=bool)
+        reset[range_offsets[lengths > 0]] = True
+
+        chunk_used = used[np.searchsorted(used, starts[first]):np.searchsorted(used, ends[last - 1])]
+        if len(chunk_used):
+            scan_of_escape = np.searchsorted(starts[first:last], chunk_used, side="right") - 1
+            in_idx = chunk_used - starts[first:last][scan_of_escape] + range_offsets[scan_of_escape]
+            values[in_idx] = _absolute_values(words, chunk_used, big_endian=False)
+            reset[in_idx] = True
+            keep[in_idx + 1] = False
+            keep[in_idx + 2] = False
+
+        wv_map = maps[scan_map[first]]
+        ndata[first:last, wv_map] = _accumulate(values[keep], reset[keep]).reshape(last - first, len(wv_map))
+    return time, np.array(wavelengths, dtype=float), ndata
+
+
 # helper missing from above:
 def _read_int32_be(filepath, offset):
     with open(filepath, "rb") as f:
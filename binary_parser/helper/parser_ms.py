@@ -2,17 +2,17 @@ import struct
 import numpy as np
 
 
-def _read_file(path):
-    with open(path, "rb") as f:
-        return f.read()
+def _map_file(path):
+    """Read-only memory map of the file, pages are only read when accessed."""
+    return np.memmap(path, dtype=np.uint8, mode="r")
 
 
 def _u16_be(buf, offset):
-    return struct.unpack(">H", buf[offset:offset + 2])[0]
+    return struct.unpack_from(">H", buf, offset)[0]
 
 
 def _u32_be(buf, offset):
-    return struct.unpack(">I", buf[offset:offset + 4])[0]
+    return struct.unpack_from(">I", buf, offset)[0]
 
 
 def _find_number_of_cycles(buf):
@@ -25,40 +25,38 @@ def _find_data_start(buf):
 
 
 def _convert_mz_intensity(data_u16):
+    data_u16 = np.asarray(data_u16, dtype=np.uint16)
     n = len(data_u16)
     n -= n % 2
-    mz = np.zeros(n // 2, dtype=float)
-    intensity = np.zeros(n // 2, dtype=float)
-
-    for i in range(n):
-        if (i & 1) == 0:
-            # MZ
-            mz[i >> 1] = data_u16[i] / 20.0
-        else:
-            # Intensity encoding: head = bits 14-15, tail = bits 0-13
-            head = data_u16[i] >> 14
-            tail = data_u16[i] & 0x3FFF
-            intensity[i >> 1] = (8 ** head) * tail
-
+    # MZ
+    mz = data_u16[0:n:2] / 20.0
+    intensity = _unpack_intensity(data_u16[1:n:2])
     return mz, intensity
 
 
+def _unpack_intensity(packed_u16):
+    # Intensity encoding: head = bits 14-15, tail = bits 0-13
+    packed = packed_u16.astype(np.int64)
+    head = packed >> 14
+    tail = packed & 0x3FFF
+    return (tail << (3 * head)).astype(float)  # 8 ** head * tail
+
+
 def _read_cycle(buf, start, cycle_size):
-    data_u16 = []
-    for i in range(cycle_size*2):
-        data_u16.append(_u16_be(buf, start + i * 2))
+    data_u16 = np.frombuffer(buf, dtype=">u2", count=cycle_size * 2, offset=start)
     return _convert_mz_intensity(data_u16)
 
 
-def read_cycles(path):
-    buf = _read_file(path)
+def _scan_cycle_headers(buf):
     data_start = _find_data_start(buf)
     num_cycles = _find_number_of_cycles(buf)
 
-    cycles = []
+    offsets = np.zeros(num_cycles, dtype=np.int64)
+    cycle_sizes = np.zeros(num_cycles, dtype=np.int64)
+    retention_time = np.zeros(num_cycles, dtype=float)
     counter = data_start
 
-    for _ in range(num_cycles):
+    for i in range(num_cycles):
         if counter >= len(buf):
             raise ValueError("Error extracting data")
 
@@ -69,17 +67,243 @@ def read_cycles(path):
         cycle_size = _u16_be(buf, counter)
         counter += 6
 
-        mz, intensity = _read_cycle(buf, counter, cycle_size)
-
-        rt = time / 60000.0
+        offsets[i] = counter
+        cycle_sizes[i] = cycle_size
+        retention_time[i] = time / 60000.0
 
         counter += cycle_size * 4
         counter += 10
 
-        cycles.append({
+    return offsets, cycle_sizes, retention_time
+
+
+class CycleTable:
+    """
+    Columnar (CSR-like) storage of decoded cycles: the points of cycle i are
+    mz[cycle_offsets[i]:cycle_offsets[i + 1]] and
+    intensity[cycle_offsets[i]:cycle_offsets[i + 1]].
+    """
+
+    def __init__(self, mz, intensity, cycle_offsets, retention_time):
+        self.mz = mz
+        self.intensity = intensity
+        self.cycle_offsets = cycle_offsets
+        self.retention_time = retention_time
+
+    def __len__(self):
+        return len(self.retention_time)
+
+    @classmethod
+    def from_cycles(cls, cycles):
+        """Pack a list of cycle dicts (as returned by read_cycles) into a table."""
+        cycle_offsets = np.zeros(len(cycles) + 1, dtype=np.int64)
+        np.cumsum([len(c["mz"]) for c in cycles], out=cycle_offsets[1:])
+        return cls(
+            np.concatenate([c["mz"] for c in cycles]) if cycles else np.zeros(0),
+            np.concatenate([c["intensity"] for c in cycles]) if cycles else np.zeros(0),
+            cycle_offsets,
+            np.array([c["retention_time"] for c in cycles], dtype=float),
+        )
+
+    def points_per_cycle(self):
+        return np.diff(self.cycle_offsets)
+
+    def cycle_ids(self):
+        """Cycle number of every point."""
+        return np.repeat(np.arange(len(self)), self.points_per_cycle())
+
+    def point_retention_time(self):
+        """Retention time of every point."""
+        return np.repeat(self.retention_time, self.points_per_cycle())
+
+    def tic(self):
+        """Total ion current per cycle."""
+        res = np.zeros(len(self), dtype=float)
+        non_empty = self.points_per_cycle() > 0
+        if non_empty.any():
+            res[non_empty] = np.add.reduceat(self.intensity, self.cycle_offsets[:-1][non_empty])
+        return res
+
+    def cycle(self, i):
+        start, stop = self.cycle_offsets[i], self.cycle_offsets[i + 1]
+        return {
+            "mz": self.mz[start:stop],
+            "intensity": self.intensity[start:stop],
+            "retention_time": float(self.retention_time[i]),
+        }
+
+
+def _decode_table(buf, offsets, cycle_sizes, retention_time):
+    """CycleTable of the cycles whose data starts at offsets in buf."""
+    cycle_offsets = np.zeros(len(offsets) + 1, dtype=np.int64)
+    np.cumsum(cycle_sizes, out=cycle_offsets[1:])
+
+    mz = np.empty(cycle_offsets[-1], dtype=float)
+    intensity = np.empty(cycle_offsets[-1], dtype=float)
+    for i, (offset, cycle_size) in enumerate(zip(offsets, cycle_sizes)):
+        start, stop = cycle_offsets[i], cycle_offsets[i + 1]
+        mz[start:stop], intensity[start:stop] = _read_cycle(buf, int(offset), int(cycle_size))
+    return CycleTable(mz, intensity, cycle_offsets, np.asarray(retention_time, dtype=float))
+
+
+class CycleIndex:
+    """
+    Index over the cycle headers of a Chemstation MS file.
+    The file is memory mapped and only the headers are scanned on
+    construction; cycles are read and decoded on access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.buf = _map_file(path)
+        self.offsets, self.cycle_sizes, self.retention_time = _scan_cycle_headers(self.buf)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def cycle(self, i):
+        mz, intensity = _read_cycle(self.buf, int(self.offsets[i]), int(self.cycle_sizes[i]))
+        return {
             "mz": mz,
             "intensity": intensity,
-            "retention_time": rt,
-        })
+            "retention_time": float(self.retention_time[i]),
+        }
+
+    def nearest(self, rt):
+        """Position of the cycle whose retention time is closest to rt."""
+        i = int(np.searchsorted(self.retention_time, rt))
+        if i == len(self):
+            return i - 1
+        if i > 0 and rt - self.retention_time[i - 1] <= self.retention_time[i] - rt:
+            return i - 1
+        return i
+
+    def spectrum_at(self, rt):
+        """Decode the cycle closest to the retention time rt (minutes)."""
+        if len(self) == 0:
+            raise ValueError("File contains no cycles")
+        return self.cycle(self.nearest(rt))
+
+    def spectra_between(self, rt0, rt1):
+        """Decode all cycles with rt0 <= retention time <= rt1."""
+        start = np.searchsorted(self.retention_time, rt0, side="left")
+        stop = np.searchsorted(self.retention_time, rt1, side="right")
+        return [self.cycle(i) for i in range(start, stop)]
+
+    def table(self, cycles=None):
+        """Decode the given cycle positions (default: all) into a CycleTable."""
+        cycles = np.arange(len(self)) if cycles is None else np.asarray(cycles, dtype=np.int64)
+        return _decode_table(
+            self.buf, self.offsets[cycles], self.cycle_sizes[cycles], self.retention_time[cycles]
+        )
+
+    def tic(self):
+        """Total ion current per cycle, aligned with retention_time."""
+        res = np.zeros(len(self), dtype=float)
+        for i, (start, cycle_size) in enumerate(zip(self.offsets, self.cycle_sizes)):
+            data_u16 = np.frombuffer(self.buf, dtype=">u2", count=int(cycle_size) * 2, offset=int(start))
+            res[i] = _unpack_intensity(data_u16[1::2]).sum()
+        return res
+
+
+def read_cycles(path):
+    index = CycleIndex(path)
+    return [index.cycle(i) for i in range(len(index))]
+
+
+def read_cycle_table(path):
+    return CycleIndex(path).table()
+
+
+def iter_cycles(path, chunk_cycles=None):
+    """
+    Stream the cycles of a Chemstation MS file without loading it completely.
+    Yields one cycle dict at a time, or a CycleTable with up to chunk_cycles
+    cycles if chunk_cycles is given.
+    """
+    with open(path, "rb") as f:
+        head = f.read(0x11A)
+        data_start = _find_data_start(head)
+        num_cycles = _find_number_of_cycles(head)
+        f.seek(data_start)
+
+        batch = []
+        for _ in range(num_cycles):
+            header = f.read(18)
+            if len(header) < 18:
+                raise ValueError("Error extracting data")
+            time = _u32_be(header, 2)
+            cycle_size = _u16_be(header, 12)
+
+            payload = f.read(cycle_size * 4 + 10)
+            mz, intensity = _read_cycle(payload, 0, cycle_size)
+            cycle = {
+                "mz": mz,
+                "intensity": intensity,
+                "retention_time": time / 60000.0,
+            }
+
+            if chunk_cycles is None:
+                yield cycle
+                continue
+            batch.append(cycle)
+            if len(batch) == chunk_cycles:
+                yield CycleTable.from_cycles(batch)
+                batch = []
+
+        if batch:
+            yield CycleTable.from_cycles(batch)
+
+
+class CycleFollower:
+    """
+    Follow an MS file that is still being acquired. Every poll() decodes only
+    the cycles appended since the last poll, starting at the remembered file
+    offset. A cycle whose record is not completely written yet, or which is
+    beyond the cycle count in the header, is left for a later poll.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = None  # file position of the next cycle record
+        self.cycles = 0
+
+    def poll(self):
+        """CycleTable of the new complete cycles, empty if there are none."""
+        with open(self.path, "rb") as f:
+            head = f.read(0x11A)
+            if len(head) < 0x11A:
+                return _decode_table(b"", [], [], [])
+            num_cycles = _find_number_of_cycles(head)
+            if self.offset is None:
+                self.offset = _find_data_start(head)
+            f.seek(self.offset)
+            buf = f.read()
+
+        offsets, cycle_sizes, retention_time = [], [], []
+        pos = 0
+        while self.cycles + len(offsets) < num_cycles and pos + 18 <= len(buf):
+            cycle_size = _u16_be(buf, pos + 12)
+            end = pos + 18 + cycle_size * 4 + 10
+            if end > len(buf):
+                break
+            offsets.append(pos + 18)
+            cycle_sizes.append(cycle_size)
+            retention_time.append(_u32_be(buf, pos + 2) / 60000.0)
+            pos = end
+
+        self.offset += pos
+        self.cycles += len(offsets)
+        return _decode_table(buf, offsets, np.array(cycle_sizes, dtype=np.int64), retention_time)
+
 
-    return cycles
+def read_tic(path, chunk_cycles=256):
+    """Total ion current per cycle, computed while streaming the file."""
+    retention_time = []
+    tic = []
+    for table in iter_cycles(path, chunk_cycles):
+        retention_time.append(table.retention_time)
+        tic.append(table.tic())
+    if not tic:
+        return np.zeros(0), np.zeros(0)
+    return np.concatenate(retention_time), np.concatenate(tic)
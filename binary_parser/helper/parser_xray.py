@@ -1,5 +1,5 @@
+import os
 import numpy as np
-import struct
 
 
 def read_doubles(filepath, offset=0):
@@ -32,15 +32,47 @@ def read_int32(filepath, offset=0, count=1000):
     """
     Reads count int32 values with endian swap.
     """
-    out = np.zeros(count, dtype=np.int32)
     with open(filepath, "rb") as f:
         f.seek(offset)
         raw = f.read(count * 4)
+    # big-endian -> int32
+    return np.frombuffer(raw, dtype=">i4", count=count).astype(np.int32)
 
-    for i in range(count):
-        (v,) = struct.unpack(">i", raw[i*4:i*4+4])  # big-endian -> int32
-        out[i] = v
-    return out
+
+def _map(filepath, dtype, offset, count):
+    dtype = np.dtype(dtype)
+    if count is None:
+        count = max(os.path.getsize(filepath) - offset, 0) // dtype.itemsize
+    if count == 0:
+        # an empty map is not possible, return an empty read-only array instead
+        empty = np.zeros(0, dtype=dtype)
+        empty.flags.writeable = False
+        return empty
+    return np.memmap(filepath, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def map_doubles(filepath, offset=0, count=None):
+    """
+    Read-only memory-mapped view of count little-endian doubles at offset
+    (default: until the end of the file). No data is read until accessed.
+    """
+    return _map(filepath, "<f8", offset, count)
+
+
+def map_floats(filepath, offset=0, count=None):
+    """
+    Read-only memory-mapped view of count little-endian floats at offset
+    (default: until the end of the file).
+    """
+    return _map(filepath, "<f4", offset, count)
+
+
+def map_int32(filepath, offset=0, count=None):
+    """
+    Read-only memory-mapped view of count big-endian int32 values at offset
+    (default: until the end of the file).
+    """
+    return _map(filepath, ">i4", offset, count)
 
 
 def read_chars(filepath):
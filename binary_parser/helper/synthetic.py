@@ -0,0 +1,308 @@
+"""
+Writers for Chemstation MS, .ch and .uv files and OpenLab spectra files and
+generators of random runs of any size, used for tests and benchmarks. The
+files hold only the fields read by parser_ms, parser_hplc and openlab.
+"""
+import struct
+
+import numpy as np
+
+from binary_parser.helper.parser_ms import CycleTable
+
+_MS_DATA_START = 754  # as in the bundled MSD1.MS files
+_CH_DATA_START = 0x1800
+_UV_DATA_START = 0x1002
+_BLOCK_SIZE = 4095  # items per delta block, the header keeps the count in 12 bits
+
+
+def _minutes_to_ms(time) -> np.ndarray:
+    return np.round(np.asarray(time, dtype=float) * 60000.0).astype(np.int64)
+
+
+# Delta compression
+
+
+def _delta_words(values, prev, escape_frequency=0.0, rng=None, big_endian=True):
+    """
+    Items of the delta compression as uint16 words: values[i] - prev[i] as a
+    single word, or the escape word followed by values[i] as int32 for
+    deltas outside int16 and for a fraction escape_frequency of the items.
+    Returns the words and the number of words of every item.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    deltas = values - prev
+    escape = (deltas <= -32768) | (deltas > 32767)
+    if escape_frequency > 0:
+        rng = np.random.default_rng() if rng is None else rng
+        escape |= rng.random(len(values)) < escape_frequency
+
+    item_words = np.where(escape, 3, 1)
+    pos = np.cumsum(item_words) - item_words
+    words = np.empty(int(item_words.sum()), dtype=np.uint16)
+    words[pos[~escape]] = deltas[~escape].astype(np.int16).view(np.uint16)
+
+    absolute = values[escape].astype(np.int32).view(np.uint32)
+    hi, lo = (absolute >> 16).astype(np.uint16), (absolute & 0xFFFF).astype(np.uint16)
+    pos = pos[escape]
+    words[pos] = 0x8000
+    words[pos + 1] = hi if big_endian else lo
+    words[pos + 2] = lo if big_endian else hi
+    return words, item_words
+
+
+def _ch_blocks(values, prev=0, escape_frequency=0.0, rng=None) -> bytes:
+    """Delta compressed blocks of a .ch file, continuing from prev."""
+    values = np.asarray(values, dtype=np.int64)
+    if not len(values):
+        return b""
+    previous = np.concatenate(([prev], values[:-1]))
+    words, item_words = _delta_words(values, previous, escape_frequency, rng)
+
+    block = np.arange(len(values)) // _BLOCK_SIZE
+    n_blocks = int(block[-1]) + 1
+    item_pos = np.cumsum(item_words) - item_words + block + 1
+    header_pos = item_pos[::_BLOCK_SIZE] - 1
+
+    out = np.empty(len(words) + n_blocks, dtype=np.uint16)
+    out[header_pos] = 0x1000 | np.bincount(block, minlength=n_blocks)
+    keep = np.ones(len(out), dtype=bool)
+    keep[header_pos] = False
+    out[keep] = words
+    return out.astype(">u2").tobytes()
+
+
+# .ch files
+
+
+def _ch_header(start_time, end_time, signal, intercept, slope) -> bytes:
+    header = bytearray(_CH_DATA_START)
+    header[:4] = b"\x03130"
+    info = f", Sig={signal},4 Ref=off".encode("utf-16-le")[:40]
+    header[0x1080:0x1080 + len(info)] = info
+    struct.pack_into(">ii", header, 0x11A, *_minutes_to_ms([start_time, end_time]).tolist())
+    struct.pack_into(">dd", header, 4724, intercept, slope)
+    return bytes(header)
+
+
+def write_ch_file(file_path: str, values, start_time: float = 0.0, end_time: float = 1.0,
+                  signal: int = 254, intercept: float = 0.0, slope: float = 1.0,
+                  escape_frequency: float = 0.0, seed=None):
+    """
+    Write the int32 signal values as a .ch file. Times are in minutes;
+    escape_frequency is the fraction of points stored as absolute values.
+    """
+    rng = np.random.default_rng(seed)
+    with open(file_path, "wb") as f:
+        f.write(_ch_header(start_time, end_time, signal, intercept, slope))
+        f.write(_ch_blocks(values, 0, escape_frequency, rng))
+        f.write(b"\x00\x00")
+
+
+def generate_ch_file(file_path: str, points: int = 3451, signal: int = 254,
+                     escape_frequency: float = 0.001, seed=0, chunk: int = 1 << 20):
+    """
+    Write a random walk of points values as a .ch file in chunks of about
+    chunk points, so files of any size can be generated.
+    """
+    rng = np.random.default_rng(seed)
+    chunk = max(chunk // _BLOCK_SIZE, 1) * _BLOCK_SIZE
+    prev = 0
+    with open(file_path, "wb") as f:
+        f.write(_ch_header(0.0, points / 150.0, signal, 0.0, 0.000476837158203125))
+        for start in range(0, points, chunk):
+            n = min(chunk, points - start)
+            values = prev + np.cumsum(rng.integers(-300, 301, n))
+            f.write(_ch_blocks(values, prev, escape_frequency, rng))
+            prev = int(values[-1])
+        f.write(b"\x00\x00")
+
+
+# .uv files
+
+
+def _uv_scans(time, data, wavelength_range, escape_frequency=0.0, rng=None) -> bytes:
+    """Scan records for the rows of data, every scan starts from zero."""
+    data = np.asarray(data, dtype=np.int64)
+    nscans, n = data.shape
+    previous = np.zeros_like(data)
+    previous[:, 1:] = data[:, :-1]
+    words, item_words = _delta_words(data.ravel(), previous.ravel(), escape_frequency, rng,
+                                     big_endian=False)
+
+    # 6 header words per scan: size, time (2 words), wstart, wstop, wstep
+    scan_words = item_words.reshape(nscans, n).sum(axis=1) + 6
+    scan_pos = np.cumsum(scan_words) - scan_words
+    out = np.empty(int(scan_words.sum()), dtype=np.uint16)
+    time_ms = _minutes_to_ms(time).astype(np.uint32)
+    out[scan_pos] = scan_words * 2
+    out[scan_pos + 1] = time_ms & 0xFFFF
+    out[scan_pos + 2] = time_ms >> 16
+    out[scan_pos + 3], out[scan_pos + 4], out[scan_pos + 5] = wavelength_range
+    keep = np.ones(len(out), dtype=bool)
+    keep[(scan_pos[:, None] + np.arange(6)).ravel()] = False
+    out[keep] = words
+    return out.astype("<u2").tobytes()
+
+
+def _uv_header(nscans: int) -> bytes:
+    header = bytearray(_UV_DATA_START)
+    header[:4] = b"\x03131"
+    struct.pack_into(">i", header, 0x116, nscans)
+    return bytes(header)
+
+
+def _wavelength_range(wavelengths) -> tuple:
+    """(wstart, wstop, wstep) in 1/20 nm of evenly spaced wavelengths in nm."""
+    wavelengths = np.asarray(wavelengths, dtype=float)
+    step = wavelengths[1] - wavelengths[0] if len(wavelengths) > 1 else 1.0
+    if not np.allclose(np.diff(wavelengths), step) or step <= 0:
+        raise ValueError("Wavelengths must be ascending and evenly spaced")
+    wstart, wstep = int(round(wavelengths[0] * 20)), int(round(step * 20))
+    return wstart, wstart + wstep * len(wavelengths), wstep
+
+
+def write_uv_file(file_path: str, time, wavelengths, data,
+                  escape_frequency: float = 0.0, seed=None):
+    """
+    Write a (scans x wavelengths) matrix of int32 values as a .uv file.
+    time is in minutes, wavelengths in nm and evenly spaced.
+    """
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data)
+    wavelength_range = _wavelength_range(wavelengths)
+    with open(file_path, "wb") as f:
+        f.write(_uv_header(len(data)))
+        f.write(_uv_scans(time, data, wavelength_range, escape_frequency, rng))
+
+
+def generate_uv_file(file_path: str, scans: int = 3443, wavelengths=None,
+                     escape_frequency: float = 0.001, seed=0, chunk_scans: int = 10000):
+    """
+    Write scans random spectra as a .uv file, by default for 190 to 398 nm in
+    steps of 2 nm. Scans are written in chunks of chunk_scans.
+    """
+    rng = np.random.default_rng(seed)
+    wavelengths = np.arange(190, 400, 2) if wavelengths is None else wavelengths
+    wavelength_range = _wavelength_range(wavelengths)
+    n = len(wavelengths)
+    with open(file_path, "wb") as f:
+        f.write(_uv_header(scans))
+        for start in range(0, scans, chunk_scans):
+            stop = min(start + chunk_scans, scans)
+            time = np.arange(start, stop) / 240.0
+            data = np.cumsum(rng.integers(-2000, 2001, (stop - start, n)), axis=1)
+            f.write(_uv_scans(time, data, wavelength_range, escape_frequency, rng))
+
+
+# Chemstation MS files
+
+
+def _encode_intensity(intensity) -> np.ndarray:
+    """Packed words of the intensities, tail << (3 * head) with a 14 bit tail."""
+    intensity = np.asarray(intensity, dtype=np.int64)
+    if intensity.min(initial=0) < 0 or intensity.max(initial=0) >= 16384 << 9:
+        raise ValueError("Intensities must be between 0 and 8388607")
+    head = (intensity >= 1 << 14).astype(np.int64) + (intensity >= 1 << 17) + (intensity >= 1 << 20)
+    return ((head << 14) | (intensity >> (3 * head))).astype(np.uint16)
+
+
+def _ms_cycles(table: CycleTable) -> bytes:
+    """Cycle records: 9 header words, mz/intensity word pairs and 5 trailer words."""
+    points = table.points_per_cycle()
+    record_words = 9 + 2 * points + 5
+    record_pos = np.cumsum(record_words) - record_words
+    out = np.zeros(int(record_words.sum()), dtype=np.uint16)
+    time_ms = _minutes_to_ms(table.retention_time).astype(np.uint32)
+    out[record_pos] = record_words
+    out[record_pos + 1] = time_ms >> 16
+    out[record_pos + 2] = time_ms & 0xFFFF
+    out[record_pos + 6] = points
+
+    point_pos = np.repeat(record_pos + 9 - 2 * table.cycle_offsets[:-1], points) + 2 * np.arange(len(table.mz))
+    out[point_pos] = np.round(np.asarray(table.mz) * 20)
+    out[point_pos + 1] = _encode_intensity(table.intensity)
+    return out.astype(">u2").tobytes()
+
+
+def _ms_header(cycles: int) -> bytes:
+    header = bytearray(_MS_DATA_START)
+    header[:4] = b"\x012\x00\x00"
+    struct.pack_into(">H", header, 0x10A, (_MS_DATA_START + 2) // 2)
+    struct.pack_into(">I", header, 0x116, cycles)
+    return bytes(header)
+
+
+def write_ms_file(file_path: str, table: CycleTable):
+    """
+    Write the cycles of table as a Chemstation MS file. mz is stored in steps
+    of 0.05, intensities below 8388608 with the precision of the packed format.
+    """
+    with open(file_path, "wb") as f:
+        f.write(_ms_header(len(table)))
+        f.write(_ms_cycles(table))
+
+
+def generate_ms_file(file_path: str, cycles: int = 465, points: int = 400, seed=0,
+                     chunk_cycles: int = 10000):
+    """
+    Write cycles random spectra with about points peaks each as a Chemstation
+    MS file, in chunks of chunk_cycles.
+    """
+    rng = np.random.default_rng(seed)
+    with open(file_path, "wb") as f:
+        f.write(_ms_header(cycles))
+        for start in range(0, cycles, chunk_cycles):
+            stop = min(start + chunk_cycles, cycles)
+            counts = rng.integers(points // 2, points * 3 // 2 + 1, stop - start)
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            n = int(offsets[-1])
+            table = CycleTable(
+                rng.integers(1000, 20000, n) / 20.0,
+                rng.integers(0, 1 << 20, n),
+                offsets,
+                np.arange(start, stop) / 300.0,
+            )
+            f.write(_ms_cycles(table))
+
+
+# OpenLab spectra files
+
+
+def write_spectra_file(file_path: str, point_counts, polarity: str = "Positive Polarity",
+                       seed=0, intensity_type: str = "f4"):
+    """
+    Write an AIA/ANDI-MS style spectra .cdf file with random m/z and
+    intensity values and point_counts points per scan, 0.5 s apart.
+    intensity_type is the NetCDF type of intensity_values, e.g. "i2" or
+    "i4" for the short and long integer formats.
+    """
+    import netCDF4 as nc
+
+    rng = np.random.default_rng(seed)
+    point_counts = np.asarray(point_counts, dtype=np.int32)
+    n = int(point_counts.sum())
+    with nc.Dataset(file_path, "w") as dataset:
+        dataset.setncattr("test_ionization_polarity", polarity)
+        dataset.setncattr("experiment_type", "Centroided Mass Spectrum")
+        dataset.createDimension("scan_number", len(point_counts))
+        dataset.createDimension("point_number", n)
+        dataset.createVariable("point_count", "i4", ("scan_number",))[:] = point_counts
+        dataset.createVariable("scan_index", "i4", ("scan_number",))[:] = (
+            np.cumsum(point_counts) - point_counts
+        )
+        dataset.createVariable("scan_acquisition_time", "f8", ("scan_number",))[:] = (
+            np.arange(len(point_counts)) * 0.5
+        )
+        dataset.createVariable("mass_values", "f4", ("point_number",))[:] = rng.uniform(100, 1000, n)
+        high = np.iinfo(intensity_type).max if intensity_type.startswith("i") else 1e5
+        dataset.createVariable("intensity_values", intensity_type, ("point_number",))[:] = (
+            rng.uniform(1, min(high, 1e5), n).astype(intensity_type)
+        )
+
+
+def generate_spectra_file(file_path: str, scans: int = 200, points: int = 400,
+                          polarity: str = "Positive Polarity", seed=0):
+    """Write scans random spectra with about points peaks each as an OpenLab spectra file."""
+    rng = np.random.default_rng(seed)
+    write_spectra_file(file_path, rng.integers(points // 2, points * 3 // 2, scans), polarity, rng)
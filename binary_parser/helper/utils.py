@@ -1,4 +1,28 @@
-from typing import Union, List
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, List, Optional, Union
 import numpy as np
 
-NumList = Union[List[float], np.ndarray]
\ No newline at end of file
+from binary_parser.helper import cache
+
+NumList = Union[List[float], np.ndarray]
+
+def map_files(func: Callable, files: List[str], workers: Optional[int] = None,
+              executor: Optional[Executor] = None) -> list:
+    """
+    Apply func to every file and return the results in the order of files.
+    Runs sequentially by default; with workers (-1 for all cores) the files
+    are processed in a process pool, or in the given executor.
+    The decode cache of this process is enabled in the pool's workers; a
+    given executor must set it up itself (see cache.init_worker).
+    """
+    if executor is not None:
+        return list(executor.map(func, files))
+    if workers is None or workers == 1 or len(files) < 2:
+        return [func(f) for f in files]
+    max_workers = os.cpu_count() if workers == -1 else workers
+    decode_cache = cache.get_cache()
+    initargs = (None,) if decode_cache is None else (decode_cache.directory, decode_cache.max_bytes)
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(files)),
+                             initializer=cache.init_worker, initargs=initargs) as pool:
+        return list(pool.map(func, files))
@@ -0,0 +1,102 @@
+"""
+Extracted-ion chromatograms over decoded MS data (Chemstation CycleTable,
+OpenLab MSScans or their long-format DataFrames).
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class XICIndex:
+    """
+    Points of all cycles sorted by (cycle, m/z) with prefix sums of the
+    intensities. m/z values are replaced by their rank among all distinct
+    m/z values, so the key cycle * n_mz + rank orders the points and the
+    points of any window in any cycle are one slice found by searchsorted.
+    """
+
+    def __init__(self, mz: np.ndarray, intensity: np.ndarray, offsets: np.ndarray,
+                 time: np.ndarray):
+        mz = np.asarray(mz, dtype=float)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        self.time = np.asarray(time)
+
+        cycle = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        self._mz_values = np.unique(mz)
+        keys = cycle * len(self._mz_values) + np.searchsorted(self._mz_values, mz)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._cumsum = np.zeros(len(mz) + 1)
+        np.cumsum(np.asarray(intensity, dtype=float)[order], out=self._cumsum[1:])
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def from_cycle_table(cls, table) -> "XICIndex":
+        """Index of a parser_ms.CycleTable (read_chemstation_arrays)."""
+        return cls(table.mz, table.intensity, table.cycle_offsets, table.retention_time)
+
+    @classmethod
+    def from_ms_scans(cls, scans) -> "XICIndex":
+        """Index of OpenLab MSScans (read_ms_scans / iter_ms_scans)."""
+        return cls(scans.mz, scans.intensities, scans.offsets, scans.time)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "XICIndex":
+        """
+        Index of a long-format DataFrame as returned by read_chemstation_file
+        (mz, intensity, retention_time) or openlab.read_ms (mz, intensities, time).
+        Rows of a cycle must be consecutive.
+        """
+        intensity = df["intensity"] if "intensity" in df else df["intensities"]
+        time = (df["retention_time"] if "retention_time" in df else df["time"]).to_numpy()
+        cycle = df["cycle_id"].to_numpy() if "cycle_id" in df else time
+        starts = np.flatnonzero(np.r_[True, cycle[1:] != cycle[:-1]]) if len(df) else np.zeros(0, dtype=np.int64)
+        offsets = np.append(starts, len(df))
+        return cls(df["mz"].to_numpy(), intensity.to_numpy(), offsets, time[starts])
+
+    def xic(self, mz, tol=0.5, max_queries: int = 1 << 22) -> np.ndarray:
+        """
+        Summed intensity of the points with mz - tol <= m/z <= mz + tol per
+        cycle for every target mz (tol may be given per target).
+        Returns a (targets x cycles) matrix; targets are processed in batches
+        of at most max_queries windows.
+        """
+        mz = np.atleast_1d(np.asarray(mz, dtype=float))
+        tol = np.broadcast_to(np.asarray(tol, dtype=float), mz.shape)
+        lo = np.searchsorted(self._mz_values, mz - tol, side="left")
+        hi = np.searchsorted(self._mz_values, mz + tol, side="right")
+
+        base = np.arange(len(self)) * len(self._mz_values)
+        res = np.empty((len(mz), len(self)))
+        step = max(1, max_queries // max(len(self), 1))
+        for first in range(0, len(mz), step):
+            last = first + step
+            start = np.searchsorted(self._keys, base + lo[first:last, None])
+            stop = np.searchsorted(self._keys, base + hi[first:last, None])
+            res[first:last] = self._cumsum[stop] - self._cumsum[start]
+        return res
+
+    def xic_frame(self, mz, tol=0.5) -> pd.DataFrame:
+        """xic as a DataFrame with one column per target and the cycle times as index."""
+        mz = np.atleast_1d(np.asarray(mz, dtype=float))
+        return pd.DataFrame(self.xic(mz, tol).T, index=pd.Index(self.time, name="time"), columns=mz)
+
+
+def xic_index(data, polarity: Optional[str] = None) -> XICIndex:
+    """
+    XICIndex of a CycleTable, MSScans or long-format DataFrame. For a list of
+    OpenLab DataFrames (openlab.read_ms) polarity ("+" or "-") selects the file.
+    """
+    if isinstance(data, list):
+        matches = [df for df in data if polarity is None or df.attrs.get("polarity") == polarity]
+        if len(matches) != 1:
+            raise ValueError(f"Expected one MS DataFrame for polarity {polarity!r}, found {len(matches)}")
+        data = matches[0]
+    if isinstance(data, pd.DataFrame):
+        return XICIndex.from_dataframe(data)
+    if hasattr(data, "cycle_offsets"):
+        return XICIndex.from_cycle_table(data)
+    return XICIndex.from_ms_scans(data)
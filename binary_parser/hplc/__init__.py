@@ -1,8 +1,12 @@
-from binary_parser.hplc.read_files import read_chromatograms, plot_chromatograms, read_uv, plot_uv
+from binary_parser.hplc.read_files import (
+    read_chromatograms, plot_chromatograms, read_uv, read_uv_cube, plot_uv, UVCube
+)
 
 __all__ = [
     'read_chromatograms',
     'plot_chromatograms',
     'read_uv',
-    'plot_uv'
-]
\ No newline at end of file
+    'read_uv_cube',
+    'plot_uv',
+    'UVCube',
+]
@@ -1,33 +1,39 @@
 import binary_parser.helper.parser_hplc as ph
+import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
-import plotly.express as px
 import re
 from os import listdir
 from os.path import isfile, join
 
-from binary_parser.helper.utils import NumList
-from typing import List
+import binary_parser.helper.decimate as decimate
+from binary_parser.helper.cache import cached
+from binary_parser.helper.utils import NumList, map_files
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple, Union
 
 
 
-def check_identical_lists(lst: List[List[float]]) -> bool:
+def check_identical_lists(lst: List) -> bool:
     if not lst:
         return False
-    first_sublist: List[float] = lst[0]
+    first_sublist: NumList = lst[0]
     for sublist in lst[1:]:
-        if sublist != first_sublist:
+        # np.array_equal compares lists and arrays (as returned by read_time) alike
+        if not np.array_equal(sublist, first_sublist):
             return False
     return True
 
 
 
-def read_time(file_path: str, length: int) -> NumList:
+def _time_axis(start: float, stop: float, length: int) -> np.ndarray:
+    return np.linspace(start, stop, length)
+
+
+
+def read_time(file_path: str, length: int) -> np.ndarray:
     offsetTime = int("0000011a", 16)
     time:NumList = ph.readTime(file_path, offsetTime)
-    step_size: float = (time[1] - time[0]) / (length - 1)
-    res: List[float] = [time[0] + i * step_size for i in range(length)]
-    return res
+    return _time_axis(time[0], time[1], length)
 
 
 
@@ -41,76 +47,258 @@ def read_file_info(file_path: str) -> int:
 
 
 
-def scale_data(file_path: str, l: NumList) -> NumList:
+def _scale(l: NumList, intercept: float, slope: float) -> np.ndarray:
+    res: np.ndarray = np.array(l, dtype=float)
+    res *= slope
+    res += intercept
+    return res
+
+
+
+def scale_data(file_path: str, l: NumList) -> np.ndarray:
     intercept: float = ph.readDouble(file_path, 4724)
     slope: float = ph.readDouble(file_path, 4732)
-    res: List[float] = [float(i) * slope + intercept for i in l]
-    return res
+    return _scale(l, intercept, slope)
+
+
+
+def _decode_channel(file_path: str) -> dict:
+    ch = ph.ChFile(file_path)
+    return {
+        "signal": np.array(ch.signal),
+        "data": _scale(ch.raw_data(), ch.intercept, ch.slope),
+        "time_range": np.array([ch.start_time, ch.end_time]),
+    }
+
+
 
+def _read_channel(file_path: str) -> Tuple[str, np.ndarray, Tuple[float, float, int]]:
+    channel = cached(file_path, "ch", lambda: _decode_channel(file_path))
+    wavelength: str = "Wavelength_" + str(int(channel["signal"]))
+    data: np.ndarray = channel["data"]
+    start, stop = channel["time_range"].tolist()
+    # time axis is described by start, stop and number of points
+    return wavelength, data, (start, stop, len(data))
 
 
-def read_chromatograms(path: str) -> pd.DataFrame:
+
+def read_chromatogram_arrays(path: str, workers: Optional[int] = None,
+                             executor: Optional[Executor] = None
+                             ) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Decode all .ch signals of a .D folder into the common time axis, the
+    signal labels and a (channels x points) array.
+    """
     files: List[str] = [
         path + "/" + f
         for f in listdir(path)
         if isfile(join(path, f)) and f.endswith(".ch")
     ]
-    wavelengths: List[str] = ["Wavelength_" + str(read_file_info(i)) for i in files]
-    offset: int = int("00001800", 16)
-    result: List[NumList] = [ph.DeltaCompression(i, offset, 12) for i in files]
-    result_scaled: List[NumList] = [
-        scale_data(files[i], result[i]) for i in range(0, len(result))
-    ]
-    times: List[List[float]] = [read_time(i, len(result[0])) for i in files]
-    if not check_identical_lists(times):
+    channels = map_files(_read_channel, files, workers, executor)
+    wavelengths: List[str] = [wavelength for wavelength, _, _ in channels]
+    time_ranges: List[Tuple[float, float, int]] = [time_range for _, _, time_range in channels]
+    if not check_identical_lists(time_ranges):
         raise ValueError("File Error")
-    time: List[float] = times[0]
-    df: pd.DataFrame = pd.DataFrame(result_scaled).transpose()
-    df.columns = wavelengths
+    data: np.ndarray = np.vstack([data for _, data, _ in channels])
+    return _time_axis(*time_ranges[0]), wavelengths, data
+
+
+
+def read_chromatograms(path: str, workers: Optional[int] = None,
+                       executor: Optional[Executor] = None) -> pd.DataFrame:
+    """
+    Read all .ch signals of a .D folder. Pass workers (-1 for all cores) or
+    an executor to decode the files in parallel.
+    """
+    time, wavelengths, data = read_chromatogram_arrays(path, workers, executor)
+    # (channels x points) in C order is exactly the column block pandas stores
+    df: pd.DataFrame = pd.DataFrame(data.T, columns=wavelengths, copy=False)
     df["time"] = time
     return df
 
 
 
-def plot_chromatograms(path: str):
-    df = read_chromatograms(path)
-    time = df["time"]
-    data = df.drop(columns=["time"])
-    wavelengths = df.columns[:-1]
-    df_melted = df.melt(id_vars="time", var_name="Wavelengths", value_name="Data")
+def plot_chromatograms(data: Union[str, pd.DataFrame], max_points: int = 4000,
+                       show: bool = True):
+    """
+    3D line plot of the chromatograms of a .D folder, or of a DataFrame
+    returned by read_chromatograms. Every trace is reduced to at most
+    max_points points with min/max decimation. Returns the figure.
+    """
+    import plotly.express as px  # plotly is only loaded for plotting
+
+    df = read_chromatograms(data) if isinstance(data, str) else data
+    time = df["time"].to_numpy()
+    traces = []
+    for label in df.columns.drop("time"):
+        idx = decimate.minmax_indices(df[label].to_numpy(), max_points)
+        traces.append(pd.DataFrame({"time": time[idx], "Wavelengths": label, "Data": df[label].to_numpy()[idx]}))
+    df_melted = pd.concat(traces, ignore_index=True)
     fig = px.line_3d(
         df_melted, x="time", y="Wavelengths", z="Data", color="Wavelengths"
     )
     fig.update_traces(marker=dict(size=5))
-    fig.show()
+    if show:
+        fig.show()
+    return fig
 
 
 
-def read_uv(path: str) -> pd.DataFrame:
-    uv = ph.UVClass(path)
-    time: pd.DataFrame = pd.DataFrame(uv.getTime())
-    wavelengths: List[int] = uv.getWavelengths().astype("int").tolist()
-    data: pd.DataFrame = pd.DataFrame(uv.getData())
-    data.columns = ["Wavelength_" + str(i) for i in wavelengths]
-    data["time"] = time
-    df_melted = data.melt(id_vars="time", var_name="Wavelengths", value_name="Data")
-    max_data = df_melted["Data"].max()
-    df_melted["Normalized_Data"] = df_melted["Data"] / max_data
-    df_unmelted = df_melted.pivot_table(
-        index="time", columns="Wavelengths", values="Normalized_Data"
+def read_uv_arrays(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Decoded time, wavelengths and (time x wavelength) data of a .uv file."""
+    uv = cached(path, "uv", lambda: dict(zip(("time", "wavelengths", "data"), ph.decode_uv(path))))
+    return uv["time"], uv["wavelengths"], uv["data"]
+
+
+
+class UVCube:
+    """
+    Decoded .uv data: a (time x wavelength) matrix with its time and
+    wavelength axes. Chromatograms and spectra are views into the matrix;
+    a DataFrame is only built by to_dataframe.
+    A normalised cube shares the matrix of the cube it was made from and
+    divides only the values that are taken out of it.
+    """
+
+    def __init__(self, time: np.ndarray, wavelengths: np.ndarray, data: np.ndarray,
+                 norm: float = 1.0):
+        self.time = time
+        self.wavelengths = wavelengths
+        self.raw = data
+        self.norm = norm
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def data(self) -> np.ndarray:
+        """The matrix divided by norm, a copy only for normalised cubes."""
+        return self._scaled(self.raw)
+
+    def _scaled(self, values: np.ndarray) -> np.ndarray:
+        return values if self.norm == 1.0 else values / self.norm
+
+    def _wavelength_index(self, wavelength):
+        """Index of the nearest recorded wavelength (or indices for a list)."""
+        wavelengths = np.asarray(wavelength, dtype=float)
+        idx = np.abs(self.wavelengths[:, None] - wavelengths.ravel()).argmin(axis=0)
+        return int(idx[0]) if wavelengths.ndim == 0 else idx
+
+    def chromatogram_at(self, wavelength) -> np.ndarray:
+        """
+        Signal over time at the nearest wavelength, a view into data unless
+        the cube is normalised. For a list of wavelengths a
+        (time x wavelengths) array is returned.
+        """
+        return self._scaled(self.raw[:, self._wavelength_index(wavelength)])
+
+    def spectrum_at(self, time: float) -> np.ndarray:
+        """Spectrum of the scan nearest to time, a view into data unless the cube is normalised."""
+        return self._scaled(self.raw[int(np.abs(self.time - time).argmin())])
+
+    def band(self, start: float, stop: float) -> np.ndarray:
+        """
+        Signal over time integrated over the wavelengths start to stop (nm),
+        in signal units times nm. At least two recorded wavelengths must lie
+        in the band; use chromatogram_at for a single wavelength.
+        """
+        inside = (self.wavelengths >= start) & (self.wavelengths <= stop)
+        if inside.sum() < 2:
+            raise ValueError(f"Less than two wavelengths between {start} and {stop} nm")
+        return self._scaled(np.trapezoid(self.raw[:, inside], self.wavelengths[inside], axis=1))
+
+    def _raw_max(self) -> float:
+        return float(np.nanmax(self.raw)) if self.raw.size else np.nan
+
+    def max(self) -> float:
+        return self._raw_max() / self.norm
+
+    def normalised(self) -> "UVCube":
+        """
+        Cube whose values are divided by the global maximum. Matrix and axes
+        are shared, nothing is copied until values are taken out.
+        """
+        return UVCube(self.time, self.wavelengths, self.raw, self._raw_max())
+
+    def labels(self) -> List[str]:
+        return ["Wavelength_" + str(i) for i in self.wavelengths.astype("int").tolist()]
+
+    def to_dataframe(self, normalise: bool = True) -> pd.DataFrame:
+        """
+        Wide DataFrame with a time column and one Wavelength_<nm> column per
+        wavelength, sorted like read_uv has always returned it.
+        """
+        labels = self.labels()
+        data = self.raw / self._raw_max() if normalise else self.data
+        if len(set(labels)) < len(labels) or np.any(np.diff(self.time) <= 0):
+            # labels or times that pivot_table would merge
+            return _uv_frame_pivot(self.time, labels, data)
+        order = sorted(range(len(labels)), key=labels.__getitem__)
+        df = pd.DataFrame(
+            data[:, order], columns=pd.Index([labels[i] for i in order], name="Wavelengths")
+        )
+        df.insert(0, "time", self.time)
+        return df
+
+
+
+def _uv_frame_pivot(time: np.ndarray, labels: List[str], data: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(data, columns=labels)
+    df["time"] = time
+    df_melted = df.melt(id_vars="time", var_name="Wavelengths", value_name="Data")
+    return df_melted.pivot_table(
+        index="time", columns="Wavelengths", values="Data"
     ).reset_index()
-    return df_unmelted
 
 
 
-def plot_uv(path: str):
-    df = read_uv(path)
-    time = df["time"]
-    data = df.drop(columns=["time"])
-    wavelengths = df.columns[:-1]
-    trace = go.Surface(x=wavelengths, y=time, z=data.values)
+def read_uv_cube(path: str) -> UVCube:
+    """Decoded .uv file as UVCube."""
+    return UVCube(*read_uv_arrays(path))
+
+
+
+def read_uv(path: str) -> pd.DataFrame:
+    return read_uv_cube(path).to_dataframe()
+
+
+
+def _uv_surface(data) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    Wavelengths, time, data and the divisor that normalises it, of a .uv
+    path, UVCube, read_uv arrays or DataFrame.
+    """
+    if isinstance(data, str):
+        data = read_uv_cube(data)
+    if isinstance(data, UVCube):
+        return data.wavelengths, data.time, data.raw, data.normalised().norm
+    if isinstance(data, pd.DataFrame):
+        values = data.drop(columns=["time"])
+        wavelengths = np.array([float(re.sub(r"^Wavelength_", "", str(c))) for c in values.columns])
+        order = np.argsort(wavelengths, kind="stable")
+        return wavelengths[order], data["time"].to_numpy(), values.to_numpy()[:, order], 1.0
+    time, wavelengths, values = data
+    return wavelengths, time, values, np.max(values)
+
+
+
+def plot_uv(data: Union[str, UVCube, pd.DataFrame, tuple], max_points: int = 200_000,
+            show: bool = True):
+    """
+    Surface plot of a .uv file, a UVCube, the DataFrame returned by read_uv
+    or the arrays returned by read_uv_arrays. The surface is averaged over
+    blocks of neighbouring cells down to at most max_points cells.
+    Returns the figure.
+    """
+    import plotly.graph_objs as go  # plotly is only loaded for plotting
+
+    wavelengths, time, values, norm = _uv_surface(data)
+    wavelengths, time, values = decimate.block_reduce(wavelengths, time, values, max_points)
+    trace = go.Surface(x=wavelengths, y=time, z=values / norm)
     fig = go.Figure(data=[trace])
-    fig.show()
+    if show:
+        fig.show()
+    return fig
 
 
 # path = "/home/konrad/Documents/GitHub/chromatogramsR/X-Vials/X3346.D/dad1.uv"
@@ -1,3 +1,5 @@
-from binary_parser.openlab.openlab import read_attr, read_lc, read_ms
+from binary_parser.openlab.openlab import (
+    read_attr, read_lc, read_ms, read_ms_scans, iter_ms_scans, ms_polarity
+)
 
-__all__ = ["read_attr", "read_lc", "read_ms"]
+__all__ = ["read_attr", "read_lc", "read_ms", "read_ms_scans", "iter_ms_scans", "ms_polarity"]
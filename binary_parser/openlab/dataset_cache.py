@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Set
+
+import netCDF4 as nc
+
+
+class LazyVariable:
+    """
+    Proxy for a NetCDF variable. The file is opened through the cache and
+    data is only read when the proxy is indexed.
+    """
+
+    def __init__(self, cache: "DatasetCache", path: str, name: str):
+        self._cache = cache
+        self._path = path
+        self.name = name
+
+    def _variable(self) -> nc.Variable:
+        return self._cache.get(self._path).variables[self.name]
+
+    def __getitem__(self, key):
+        return self._variable()[key]
+
+    def __len__(self):
+        return len(self._variable())
+
+    @property
+    def shape(self):
+        return self._variable().shape
+
+    @property
+    def dtype(self):
+        return self._variable().dtype
+
+
+class DatasetCache:
+    """
+    Open netCDF4 datasets shared between readers, with LRU eviction.
+    Datasets opened within a session() are pinned until that session ends,
+    so eviction never closes a dataset another thread is still reading.
+    All datasets are closed when the last session ends.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._datasets: "OrderedDict[str, nc.Dataset]" = OrderedDict()
+        self._users: Dict[str, int] = {}
+        self._depth = 0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    def _sessions(self) -> List[Set[str]]:
+        """Keys pinned by the open sessions of the current thread, innermost last."""
+        if not hasattr(self._local, "sessions"):
+            self._local.sessions = []
+        return self._local.sessions
+
+    def get(self, path: str) -> nc.Dataset:
+        key = os.path.abspath(path)
+        with self._lock:
+            if key in self._datasets:
+                self._datasets.move_to_end(key)
+                dataset = self._datasets[key]
+            else:
+                dataset = nc.Dataset(path, "r")
+                self._datasets[key] = dataset
+            sessions = self._sessions()
+            if sessions and key not in sessions[-1]:
+                sessions[-1].add(key)
+                self._users[key] = self._users.get(key, 0) + 1
+            self._evict()
+            return dataset
+
+    def _evict(self):
+        """Close the least recently used datasets no session is using."""
+        excess = len(self._datasets) - self.maxsize
+        for key in [k for k in self._datasets if not self._users.get(k)][:max(excess, 0)]:
+            self._datasets.pop(key).close()
+
+    def variable(self, path: str, name: str) -> LazyVariable:
+        return LazyVariable(self, path, name)
+
+    def attributes(self, path: str) -> dict:
+        dataset = self.get(path)
+        return {key: dataset.getncattr(key) for key in dataset.ncattrs()}
+
+    def clear(self):
+        with self._lock:
+            while self._datasets:
+                _, dataset = self._datasets.popitem()
+                dataset.close()
+            self._users.clear()
+
+    @contextmanager
+    def session(self):
+        sessions = self._sessions()
+        with self._lock:
+            self._depth += 1
+            sessions.append(set())
+        try:
+            yield self
+        finally:
+            with self._lock:
+                for key in sessions.pop():
+                    self._users[key] -= 1
+                    if not self._users[key]:
+                        del self._users[key]
+                self._depth -= 1
+                if self._depth == 0:
+                    self.clear()
+                else:
+                    self._evict()
@@ -1,11 +1,17 @@
 import os
 import re
-from typing import List
+from concurrent.futures import Executor
+from typing import Iterator, List, Optional, Tuple
 
-import netCDF4 as nc
 import numpy as np
 import pandas as pd
 
+from binary_parser.helper.cache import cached
+from binary_parser.helper.utils import map_files
+from binary_parser.openlab.dataset_cache import DatasetCache
+
+# Datasets opened by the readers below; each file is opened once per call
+_datasets = DatasetCache()
 
 
 
@@ -30,9 +36,8 @@ def get_files(path: str) -> List[str]:
 
 def _get_attr(path: str):
     """Read global NetCDF attributes from a file."""
-    with nc.Dataset(path, "r") as dataset:
-        attr = {key: dataset.getncattr(key) for key in dataset.ncattrs()}
-    return attr
+    with _datasets.session():
+        return _datasets.attributes(path)
 
 
 
@@ -42,7 +47,8 @@ def read_attr(path: str) -> pd.DataFrame:
     Returns a normalized DataFrame.
     """
     fs = get_files(path)
-    attrs_lc = [pd.DataFrame([_get_attr(fs[x])]) for x in range(len(fs))]
+    with _datasets.session():
+        attrs_lc = [pd.DataFrame([_get_attr(fs[x])]) for x in range(len(fs))]
     attrs_lc = pd.concat(attrs_lc, ignore_index=True)
     return attrs_lc
 
@@ -52,13 +58,33 @@ def read_attr(path: str) -> pd.DataFrame:
 # ---------------------------------------------------------------------------
 
 
+def _filled(values: np.ndarray) -> np.ndarray:
+    """Plain array of a NetCDF variable, masked values become NaN."""
+    if np.ma.is_masked(values):
+        return np.ma.filled(values.astype(np.result_type(values.dtype, np.float32)), np.nan)
+    return np.ma.getdata(values)
+
+
+
+def _decode_lc(path: str) -> dict:
+    with _datasets.session():
+        return {
+            "ordinate_values": _filled(_datasets.variable(path, "ordinate_values")[:]),
+            "detector_name": np.array(_datasets.attributes(path).get("detector_name", "")),
+            "actual_run_time_length": _filled(
+                _datasets.variable(path, "actual_run_time_length")[...]
+            ),
+        }
+
+
+
 def get_lc_data(path: str) -> pd.DataFrame:
     """Read LC detector signals from NetCDF."""
-    with nc.Dataset(path, "r") as dataset:
-        detector_signals = dataset.variables["ordinate_values"][:]
-        global_atts = {key: dataset.getncattr(key) for key in dataset.ncattrs()}
-        detector = global_atts.get("detector_name", "")
-        run_time_length = dataset.variables["actual_run_time_length"][...]
+    lc = cached(path, "openlab_lc", lambda: _decode_lc(path))
+    detector_signals = lc["ordinate_values"]
+    detector = str(lc["detector_name"])
+    # masked like the NetCDF variable, keeps the float32 arithmetic of linspace
+    run_time_length = np.ma.asarray(lc["actual_run_time_length"])
 
     data = pd.DataFrame(
         {
@@ -86,12 +112,17 @@ def process_detector_info(df_list: List[pd.DataFrame]) -> List[pd.DataFrame]:
 
 
 
-def read_lc(path: str) -> pd.DataFrame:
-    """Read all LC files containing 'DAD' in filename and concatenate."""
+def read_lc(path: str, workers: Optional[int] = None,
+            executor: Optional[Executor] = None) -> pd.DataFrame:
+    """
+    Read all LC files containing 'DAD' in filename and concatenate.
+    Pass workers (-1 for all cores) or an executor to read the files in parallel.
+    """
     fs = get_files(path)
     # Filter fs --> Files which contain DAD within their name
     fs = [f for f in fs if "DAD" in os.path.basename(f)]
-    df = [get_lc_data(fs[x]) for x in range(len(fs))]
+    with _datasets.session():
+        df = map_files(get_lc_data, fs, workers, executor)
     df = process_detector_info(df)
     df = pd.concat(df, ignore_index=True)
     return df
@@ -103,58 +134,170 @@ def read_lc(path: str) -> pd.DataFrame:
 
 
 def _get_point_counts(path: str) -> np.ma.MaskedArray:
-    with nc.Dataset(path, "r") as dataset:
-        res = dataset.variables["point_count"][:]
-        return res
+    with _datasets.session():
+        return _datasets.variable(path, "point_count")[:]
 
 
 
-def _get_ms_data(path: str) -> pd.DataFrame:
-    with nc.Dataset(path, "r") as dataset:
-        mz_values = dataset.variables["mass_values"][:]
-        intensities = dataset.variables["intensity_values"][:]
-    return pd.DataFrame({"mz": mz_values, "intensities": intensities})
+def _get_ms_data(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    with _datasets.session():
+        mz_values = _datasets.variable(path, "mass_values")[:]
+        intensities = _datasets.variable(path, "intensity_values")[:]
+    return _filled(mz_values), _filled(intensities)
 
 
 
 def _get_scan_time(path: str) -> np.ma.MaskedArray:
-    with nc.Dataset(path, "r") as dataset:
-        time = dataset.variables["scan_acquisition_time"][:]
+    with _datasets.session():
+        time = _datasets.variable(path, "scan_acquisition_time")[:]
     return time / 60
 
 
 
-def _split_data(
-    data: pd.DataFrame, point_counts: np.ma.MaskedArray
-) -> List[pd.DataFrame]:
-    end_indices = np.cumsum(point_counts)
-    start_indices = np.insert(end_indices[:-1], 0, 0)
-    res = [data.iloc[start:end] for start, end in zip(start_indices, end_indices)]
-    return res
+class MSScans:
+    """
+    Scans of an MS file stored as flat arrays: the points of scan i are
+    mz[offsets[i]:offsets[i + 1]] and intensities[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, mz: np.ndarray, intensities: np.ndarray,
+                 offsets: np.ndarray, time: np.ndarray):
+        self.mz = mz
+        self.intensities = intensities
+        self.offsets = offsets
+        self.time = time
+
+    def __len__(self):
+        return len(self.time)
 
+    def point_counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
 
+    def normalise(self) -> "MSScans":
+        """Scale every scan to a maximum intensity of 100."""
+        # integer intensities (short/long AIA formats) are scaled as float64
+        dtype = self.intensities.dtype
+        scale = np.ones(len(self), dtype=dtype if np.issubdtype(dtype, np.floating) else np.float64)
+        non_empty = self.point_counts() > 0
+        if non_empty.any():
+            maxima = np.fmax.reduceat(self.intensities, self.offsets[:-1][non_empty])
+            scale[non_empty] = 100 / maxima
+        intensities = self.intensities * np.repeat(scale, self.point_counts())
+        return MSScans(self.mz, intensities, self.offsets, self.time)
 
-def _normalise(data_list: List[pd.DataFrame]) -> List[pd.DataFrame]:
-    return [
-        df.assign(intensities=df["intensities"] * (100 / df["intensities"].max()))
-        for df in data_list
-    ]
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "mz": self.mz,
+            "intensities": self.intensities,
+            "time": np.repeat(self.time, self.point_counts()),
+        })
 
 
 
-def read_ms(path: str) -> List[pd.DataFrame]:
-    fs = get_files(path)
-    fs_ms = [f for f in fs if "spectra" in os.path.basename(f)]
-    data_minus = _get_ms_data(fs_ms[0])
-    point_counts_minus = _get_point_counts(fs_ms[0])
-    time_minus = _get_scan_time(fs_ms[0])
-    df_minus = _normalise(_split_data(data_minus, point_counts_minus))
-
-    data_plus = _get_ms_data(fs_ms[1])
-    point_counts_plus = _get_point_counts(fs_ms[1])
-    time_plus = _get_scan_time(fs_ms[1])
-    df_plus = _normalise(_split_data(data_plus, point_counts_plus))
-
-    df_minus = pd.concat([df.assign(time=t) for df, t in zip(df_minus, time_minus)])
-    df_plus = pd.concat([df.assign(time=t) for df, t in zip(df_plus, time_plus)])
-    return [df_minus, df_plus]
+def read_ms_scans(file_path: str) -> MSScans:
+    """Read one OpenLab spectra .cdf file into flat arrays with scan offsets."""
+    scans = cached(file_path, "openlab_ms", lambda: _decode_ms(file_path))
+    return MSScans(scans["mz"], scans["intensities"], scans["offsets"], scans["time"])
+
+
+
+def _decode_ms(file_path: str) -> dict:
+    with _datasets.session():
+        mz, intensities = _get_ms_data(file_path)
+        point_counts = _filled(_get_point_counts(file_path))
+        time = _filled(_get_scan_time(file_path))
+    offsets = np.zeros(len(point_counts) + 1, dtype=np.int64)
+    np.cumsum(point_counts, out=offsets[1:])
+    return {"mz": mz, "intensities": intensities, "offsets": offsets, "time": time}
+
+
+
+def iter_ms_scans(file_path: str, scans_per_chunk: int = 1000) -> Iterator[MSScans]:
+    """
+    Stream a spectra .cdf file as normalised MSScans of up to scans_per_chunk
+    scans. Mass and intensity values are read as hyperslabs located with
+    scan_index and point_count, so memory does not grow with the run length.
+    """
+    with _datasets.session():
+        point_counts = _filled(_get_point_counts(file_path)).astype(np.int64)
+        scan_index = _filled(_datasets.variable(file_path, "scan_index")[:]).astype(np.int64)
+        time = _filled(_get_scan_time(file_path))
+        mass_values = _datasets.variable(file_path, "mass_values")
+        intensity_values = _datasets.variable(file_path, "intensity_values")
+
+        for first in range(0, len(point_counts), scans_per_chunk):
+            last = min(first + scans_per_chunk, len(point_counts))
+            counts = point_counts[first:last]
+            starts = scan_index[first:last]
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+
+            slab_start = int(starts.min())
+            slab_stop = int((starts + counts).max())
+            mz = _filled(mass_values[slab_start:slab_stop])
+            intensities = _filled(intensity_values[slab_start:slab_stop])
+
+            # scans are normally stored back to back, otherwise pick their points
+            if not np.array_equal(starts - slab_start, offsets[:-1]):
+                idx = np.repeat(starts - slab_start - offsets[:-1], counts) + np.arange(offsets[-1])
+                mz, intensities = mz[idx], intensities[idx]
+
+            yield MSScans(mz, intensities, offsets, time[first:last]).normalise()
+
+
+
+_POLARITIES = {"+": "+", "positive": "+", "-": "-", "negative": "-"}
+
+
+
+def ms_polarity(file_path: str) -> str:
+    """
+    Polarity ("+" or "-") of a spectra file from its NetCDF attributes,
+    only the header is read. Returns "" if it cannot be determined.
+    """
+    return str(cached(file_path, "openlab_polarity", lambda: _decode_polarity(file_path))["polarity"])
+
+
+
+def _decode_polarity(file_path: str) -> dict:
+    with _datasets.session():
+        attr = _datasets.attributes(file_path)
+    polarity = str(attr.get("test_ionization_polarity", "")).lower()
+    if polarity.startswith("pos"):
+        return {"polarity": np.array("+")}
+    if polarity.startswith("neg"):
+        return {"polarity": np.array("-")}
+    match = re.search(r"([+-])TIC", str(attr.get("detector_name", "")))
+    return {"polarity": np.array(match.group(1) if match else "")}
+
+
+
+def _read_ms_file(file_path: str) -> pd.DataFrame:
+    df = read_ms_scans(file_path).normalise().to_dataframe()
+    df.attrs["polarity"] = ms_polarity(file_path)
+    return df
+
+
+
+def read_ms(path: str, polarity: Optional[str] = None, files: Optional[List[str]] = None,
+            workers: Optional[int] = None, executor: Optional[Executor] = None) -> List[pd.DataFrame]:
+    """
+    Read the spectra .cdf files of an OpenLab export, one DataFrame per file
+    in natural sort order.
+    polarity ("+"/"positive" or "-"/"negative") loads only files of that
+    polarity, files restricts loading to the given file names or paths.
+    Pass workers (-1 for all cores) or an executor to load files in parallel.
+    """
+    if files is None:
+        fs = get_files(path)
+        fs_ms = [f for f in fs if "spectra" in os.path.basename(f)]
+    else:
+        fs_ms = [f if os.path.isabs(f) else os.path.join(path, f) for f in files]
+
+    if polarity is not None and polarity.lower() not in _POLARITIES:
+        raise ValueError(f"Unknown polarity: {polarity}")
+
+    with _datasets.session():
+        if polarity is not None:
+            fs_ms = [f for f in fs_ms if ms_polarity(f) == _POLARITIES[polarity.lower()]]
+        return map_files(_read_ms_file, fs_ms, workers, executor)
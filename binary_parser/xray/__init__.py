@@ -1,4 +1,3 @@
-from binary_parser.xray.bruker_xray import read_raw
-
-__all__ = ["read_raw"]
+from binary_parser.xray.bruker_xray import read_raw, read_raw_index
 
+__all__ = ["read_raw", "read_raw_index"]
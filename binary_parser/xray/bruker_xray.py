@@ -1,95 +1,78 @@
+import struct
+from typing import List
+
+import numpy as np
+
 import binary_parser.helper.parser_xray as px
-import pandas as pd
-
-search_for = {
-    "GONIOMETER_RADIUS": 217.5,
-    "FIXED_DIVSLIT": 0.6,
-    "SAMPLESLIT": 0.0,
-    "DETSLIT": 10.39,
-    "ANTISLIT": 6.17,
-    "START": 20.0,
-    "THETA": 10.0,
-    "THETA2": 20.0,
-    "TIMESTARTED": 14,
-    "TEMP_RATE": -1,
-    "TEMP_DELAY": -1,
-    "KV": 35,
-    "MA": 45,
-    "WL1": 1.540600,
-    "WL2": 1.544390,
-    "WL3": 1.392220,
-}
-
-res = px.readDoubles(
-    "/home/konrad/Documents/GitHub/RProjects/chromatogramsR/Bruker/PD.raw", 0
-)
-df = pd.DataFrame(res)
-df.columns = ["data"]
-
-for key, value in search_for.items():
-    result_df = df[df["data"].eq(value)]
-    if not result_df.empty:
-        print(f"Match found for {key} at index {result_df.index[0]}")
-
-print()
-print()
-print()
-
-res = px.readFloates(
-    "/home/konrad/Documents/GitHub/RProjects/chromatogramsR/Bruker/PD.raw", 0
-)
-df = pd.DataFrame(res)
-df.columns = ["data"]
-
-for key, value in search_for.items():
-    result_df = df[df["data"].eq(value)]
-    if not result_df.empty:
-        print(f"Match found for {key} at index {result_df.index[0]}")
-
-
-# data starts at 0x420 --> 1056 --> in float index 264 --> 263 in python
-# data is read as float until end of file
-print()
-print()
-print()
-
-
-path = "/home/konrad/Documents/GitHub/RProjects/chromatogramsR/Bruker/WeitereDaten/XRD/7_80_3_001651_Cu_SSZ13_05_7.raw"
-# _WL1=1.540600
-# _WL2=1.544390
-# _WL3=0.00000
-# _WLRATIO=0.500000
-# _START=7.000000
-# _THETA=3.500000
-# _2THETA=7.000000
-
-# xxd
-# 000003c8: 0000 5c00 0000 0200  ..\..... --> 968
-# 000003d0: 0000 3254 6865 7461  ..2Theta --> 976
-# 000003d8: 0000 0000 0000 0000  ........
-# 000003e0: 0000 0000 0000 0000  ........
-# 000003e8: 0000 0000 0000 0000  ........
-# 000003f0: 0000 0000 0000 0000  ........
-# 000003f8: 0000 0100 0000 0000  ........
-# 00000400: 0000 0000 1c40 0000  .....@..
-# 00000408: 0000 0000 0000 0000  ........
-# 00000410: 0000 0000 0000 0000  ........
-# 00000418: 0000 0000 0000 0000  ........
-# 00000420: 0000 3200 0000 5c00  ..2...\.
-
-
-res = px.readDoubles(path, 0)
-df = pd.DataFrame(res)
-df.columns = ["data"]
-print(df.iloc[100:130])
-df = df[(df.round() != 0.0) & (df < 1000.0) & (df > 0.0)].dropna()
-df = df.iloc[0:60]
-
-
-res = px.readFloates(path, 0)
-
-df = pd.DataFrame(res)
-print(df.iloc[240:250])
-df.columns = ["data"]
-df = df[(df.round() != 0.0) & (df < 1000.0) & (df > 0.0)].dropna()
-df = df.iloc[0:60]
+
+# Bruker DIFFRAC RAW version 3 ("RAW1.01") layout:
+# a 712 byte file header followed by one range per measured scan. Every range
+# has a 304 byte header, an optional supplementary header and `steps` float32
+# intensities. A single range with a 40 byte supplementary header puts the
+# data at 0x420.
+_FILE_HEADER_SIZE = 712
+_RANGE_HEADER_SIZE = 304
+
+
+class RawRange:
+    """Position and scan parameters of one range in a RAW file."""
+
+    def __init__(self, steps: int, start_2theta: float, step_size: float,
+                 data_offset: int):
+        self.steps = steps
+        self.start_2theta = start_2theta
+        self.step_size = step_size
+        self.data_offset = data_offset
+
+    def two_theta(self) -> np.ndarray:
+        return self.start_2theta + np.arange(self.steps) * self.step_size
+
+
+class RawIndex:
+    """Header values and range index of a RAW file."""
+
+    def __init__(self, version: str, wl1: float, wl2: float,
+                 ranges: List[RawRange]):
+        self.version = version
+        self.wl1 = wl1
+        self.wl2 = wl2
+        self.ranges = ranges
+
+
+def read_raw_index(path: str) -> RawIndex:
+    """Parse the file header and all range headers without reading any data."""
+    with open(path, "rb") as f:
+        header = f.read(_FILE_HEADER_SIZE)
+        version = header[:7].decode("latin-1")
+        if version != "RAW1.01" or len(header) < _FILE_HEADER_SIZE:
+            raise ValueError(f"Unsupported RAW file version: {version!r}")
+
+        range_count = struct.unpack_from("<I", header, 12)[0]
+        wl1, wl2 = struct.unpack_from("<dd", header, 624)
+
+        ranges = []
+        offset = _FILE_HEADER_SIZE
+        for _ in range(range_count):
+            f.seek(offset)
+            range_header = f.read(_RANGE_HEADER_SIZE)
+            if len(range_header) < _RANGE_HEADER_SIZE:
+                raise ValueError("Error extracting data")
+            header_size, steps = struct.unpack_from("<II", range_header, 0)
+            start_2theta = struct.unpack_from("<d", range_header, 16)[0]
+            step_size = struct.unpack_from("<d", range_header, 176)[0]
+            supplementary_size = struct.unpack_from("<I", range_header, 256)[0]
+
+            data_offset = offset + header_size + supplementary_size
+            ranges.append(RawRange(steps, start_2theta, step_size, data_offset))
+            offset = data_offset + steps * 4
+
+    return RawIndex(version, wl1, wl2, ranges)
+
+
+def read_raw(path: str, range_id: int = 0) -> np.ndarray:
+    """
+    Intensities of one range of a Bruker RAW file as a read-only,
+    memory-mapped float32 view.
+    """
+    raw_range = read_raw_index(path).ranges[range_id]
+    return px.map_floats(path, raw_range.data_offset, raw_range.steps)
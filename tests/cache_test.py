@@ -0,0 +1,75 @@
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+import binary_parser as bp
+from binary_parser.chemstation import read_chemstation_arrays
+from binary_parser.helper import cache, utils
+
+
+@pytest.fixture
+def decode_cache(tmp_path):
+    yield bp.enable_cache(str(tmp_path / "cache"))
+    bp.disable_cache()
+
+
+def test_cache_roundtrip(decode_cache, monkeypatch):
+    file_path = "./tests/Chemstation/SVS_1025F1.D/MSD1.MS"
+    table = read_chemstation_arrays(file_path)
+    assert len(os.listdir(decode_cache.directory)) == 1
+
+    # served from the cache without decoding again
+    monkeypatch.setattr("binary_parser.helper.parser_ms.read_cycle_table", None)
+    cached_table = read_chemstation_arrays(file_path)
+    assert np.array_equal(cached_table.intensity, table.intensity)
+    assert np.array_equal(cached_table.cycle_offsets, table.cycle_offsets)
+
+    df = bp.read_chromatograms("./tests/X3346.D")
+    assert df.equals(bp.read_chromatograms("./tests/X3346.D"))
+    assert len(os.listdir(decode_cache.directory)) == 6
+
+    decode_cache.invalidate(file_path)
+    assert len(os.listdir(decode_cache.directory)) == 5
+    decode_cache.invalidate()
+    assert os.listdir(decode_cache.directory) == []
+
+
+def test_cache_eviction(tmp_path):
+    small = cache.DecodeCache(str(tmp_path / "cache"), max_bytes=1500)
+    for name in ["a", "b", "c"]:
+        file_path = tmp_path / name
+        file_path.write_bytes(b"x")
+        small.store(str(file_path), "test", {"data": np.zeros(100)})
+    assert small.load(str(tmp_path / "a"), "test") is None
+    assert small.load(str(tmp_path / "c"), "test") is not None
+
+
+def test_cache_in_workers(decode_cache, monkeypatch):
+    # forkserver workers do not inherit the cache of the parent process
+    context = multiprocessing.get_context("forkserver")
+    monkeypatch.setattr(utils, "ProcessPoolExecutor", functools.partial(ProcessPoolExecutor, mp_context=context))
+    bp.read_chromatograms("./tests/X3346.D", workers=2)
+    assert len(os.listdir(decode_cache.directory)) == 5
+
+
+def test_cache_entry_evicted_after_load(tmp_path, monkeypatch):
+    small = cache.DecodeCache(str(tmp_path / "cache"))
+    file_path = tmp_path / "a"
+    file_path.write_bytes(b"x")
+    small.store(str(file_path), "test", {"data": np.arange(3)})
+
+    # another worker evicts the entry between np.load and os.utime
+    load = np.load
+
+    def load_then_evict(entry, *args, **kwargs):
+        data = load(entry, *args, **kwargs)
+        os.remove(entry)
+        return data
+
+    monkeypatch.setattr(cache.np, "load", load_then_evict)
+    arrays = small.load(str(file_path), "test")
+    assert arrays["data"].tolist() == [0, 1, 2]
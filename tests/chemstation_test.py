@@ -1,5 +1,10 @@
 import binary_parser as bp
+import binary_parser.helper.parser_ms as pm
+import binary_parser.helper.synthetic as sy
+from binary_parser.helper.xic import XICIndex
+from binary_parser.chemstation.read_ms_file import read_chemstation_arrays, merge_cycles_into_df
 import pandas as pd
+import pytest
 import numpy as np
 
 
@@ -97,3 +102,108 @@ def test_scs776roh():
             delimiter=",", encoding="utf-16", header=None
         )
         compare_spectras(df, spectra_true, time)
+
+
+def test_cycle_index():
+    file_path = "./tests/Chemstation/SVS_1025F1.D/MSD1.MS"
+    df = bp.read_chemstation_file(file_path)
+    index = pm.CycleIndex(file_path)
+    assert len(index) == 465
+    assert isinstance(index.buf, np.memmap)  # cycles are only read on access
+
+    spectrum = index.spectrum_at(4.687)
+    expected = df[df["retention_time"].round(3) == 4.687]
+    assert np.array_equal(spectrum["mz"], expected["mz"])
+    assert np.array_equal(spectrum["intensity"], expected["intensity"])
+
+    spectra = index.spectra_between(4.0, 5.0)
+    expected = df[(df["retention_time"] >= 4.0) & (df["retention_time"] <= 5.0)]
+    assert sum(len(s["mz"]) for s in spectra) == len(expected)
+
+    tic = df.groupby("retention_time")["intensity"].sum()
+    assert np.allclose(index.tic(), tic.values)
+
+
+def test_cycle_table():
+    file_path = "./tests/Chemstation/SVS-776ROH.D/MSD1.MS"
+    table = read_chemstation_arrays(file_path)
+    cycles = pm.read_cycles(file_path)
+    assert len(table) == len(cycles)
+    assert table.cycle_offsets[-1] == len(table.mz)
+    pd.testing.assert_frame_equal(
+        bp.read_chemstation_file(file_path), merge_cycles_into_df(cycles)
+    )
+
+
+def test_iter_cycles():
+    file_path = "./tests/Chemstation/SVS_1025F1.D/MSD1.MS"
+    table = read_chemstation_arrays(file_path)
+    chunks = list(pm.iter_cycles(file_path, chunk_cycles=100))
+    assert [len(c) for c in chunks] == [100, 100, 100, 100, 65]
+    assert np.array_equal(np.concatenate([c.mz for c in chunks]), table.mz)
+    first = next(pm.iter_cycles(file_path))
+    assert np.array_equal(first["intensity"], table.cycle(0)["intensity"])
+
+    retention_time, tic = pm.read_tic(file_path)
+    assert np.array_equal(retention_time, table.retention_time)
+    assert np.allclose(tic, pm.CycleIndex(file_path).tic())
+
+
+def test_write_ms_file(tmp_path):
+    file_path = str(tmp_path / "MSD1.MS")
+    table = pm.CycleTable(
+        np.array([100.05, 200.1, 300.0, 50.5, 60.0]),
+        np.array([5.0, 16384.0, 1048576.0, 100.0, 7.0]),
+        np.array([0, 3, 3, 5]),
+        np.array([0.5, 0.6, 0.7]),
+    )
+    sy.write_ms_file(file_path, table)
+    res = pm.read_cycle_table(file_path)
+    assert np.array_equal(res.mz, table.mz)
+    assert np.array_equal(res.intensity, table.intensity)
+    assert np.array_equal(res.cycle_offsets, table.cycle_offsets)
+    assert np.array_equal(res.retention_time, table.retention_time)
+
+
+def test_generate_ms_file(tmp_path):
+    file_path = str(tmp_path / "MSD1.MS")
+    sy.generate_ms_file(file_path, cycles=250, points=40, chunk_cycles=100)
+    cycles = pm.read_cycles(file_path)
+    assert len(cycles) == 250
+    assert all(20 <= len(c["mz"]) <= 60 for c in cycles)
+    assert read_chemstation_arrays(file_path).tic().shape == (250,)
+
+
+def test_xic():
+    file_path = "./tests/Chemstation/SVS_1025F1.D/MSD1.MS"
+    df = bp.read_chemstation_file(file_path)
+    index = XICIndex.from_cycle_table(read_chemstation_arrays(file_path))
+    targets = [150.0, 207.05, 431.2]
+    res = index.xic(targets, tol=0.5, max_queries=1000)
+    assert res.shape == (3, 465)
+    for row, mz in zip(res, targets):
+        window = df[(df["mz"] >= mz - 0.5) & (df["mz"] <= mz + 0.5)]
+        expected = window.groupby("cycle_id")["intensity"].sum()
+        assert np.allclose(row[expected.index], expected.values)
+        assert row.sum() == pytest.approx(expected.sum())
+    assert np.allclose(XICIndex.from_dataframe(df).xic(targets, tol=0.5), res)
+
+
+def test_cycle_follower(tmp_path):
+    sy.generate_ms_file(str(tmp_path / "full.MS"), cycles=120, points=30)
+    with open(tmp_path / "full.MS", "rb") as f:
+        data = f.read()
+
+    # the cycle count in the header is ahead of the cycles written so far
+    file_path = tmp_path / "MSD1.MS"
+    file_path.write_bytes(b"")
+    follower = pm.CycleFollower(str(file_path))
+    tables = []
+    for size in list(range(0, len(data), 1001)) + [len(data)]:
+        file_path.write_bytes(data[:size])
+        tables.append(follower.poll())
+    expected = pm.read_cycle_table(str(tmp_path / "full.MS"))
+    assert follower.cycles == 120
+    assert np.array_equal(np.concatenate([t.mz for t in tables]), expected.mz)
+    assert np.array_equal(np.concatenate([t.tic() for t in tables]), expected.tic())
+    assert len(follower.poll()) == 0
@@ -0,0 +1,46 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from binary_parser.cli import find_jobs, main, run
+
+pytest.importorskip("pyarrow")
+
+
+def copy_run(tmp_path):
+    root = tmp_path / "runs"
+    shutil.copytree("./tests/X3346.D", root / "X3346.D")
+    shutil.copy("./tests/Chemstation/SVS_1025F1.D/MSD1.MS", root / "X3346.D" / "MSD1.MS")
+    return str(root)
+
+
+def test_find_jobs(tmp_path):
+    root = copy_run(tmp_path)
+    jobs = list(find_jobs(root, "out"))
+    assert [os.path.basename(job[1]) for job in jobs] == [
+        "chromatograms.parquet", "MSD1.MS.parquet", "dad1.uv.parquet"
+    ]
+    assert len(jobs[0][2]) == 5
+
+
+def test_run_resumes(tmp_path):
+    root = copy_run(tmp_path)
+    out = str(tmp_path / "out")
+    stats = run(root, out, workers=2)
+    assert (stats["converted"], stats["skipped"], stats["failed"]) == (3, 0, 0)
+    assert os.path.exists(os.path.join(out, "X3346.D", "chromatograms.parquet"))
+
+    uv = os.path.join(root, "X3346.D", "dad1.uv")
+    os.utime(uv, (time.time() + 10,) * 2)
+    stats = run(root, out)
+    assert (stats["converted"], stats["skipped"], stats["failed"]) == (1, 2, 0)
+
+
+def test_main_reports_failures(tmp_path, capsys):
+    root = tmp_path / "runs"
+    root.mkdir()
+    (root / "broken.raw").write_bytes(b"RAW4.00" + bytes(100))
+    assert main([str(root), str(tmp_path / "out"), "-j", "1"]) == 1
+    assert "0 converted, 0 skipped, 1 failed" in capsys.readouterr().out
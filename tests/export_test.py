@@ -0,0 +1,77 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+import binary_parser as bp
+from binary_parser.export import convert, detect_format, ms_output
+from binary_parser.helper.synthetic import write_spectra_file
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_convert_chemstation(tmp_path):
+    file_path = "./tests/Chemstation/SVS_1025F1.D/MSD1.MS"
+    out = str(tmp_path / "ms.parquet")
+    assert convert(file_path, out, chunk=50) == "chemstation_ms"
+
+    table = pq.read_table(out)
+    df = bp.read_chemstation_file(file_path)
+    assert table.column_names == ["mz", "intensity", "retention_time", "cycle_id"]
+    assert np.array_equal(table["cycle_id"].to_numpy(), df["cycle_id"].to_numpy())
+    assert np.array_equal(table["intensity"].to_numpy(), df["intensity"].to_numpy())
+    meta = json.loads(table.schema.metadata[b"binary_parser"])
+    assert meta["format"] == "chemstation_ms"
+
+
+def test_convert_chromatograms_and_uv(tmp_path):
+    out = str(tmp_path / "ch.arrow")
+    assert convert("./tests/X3346.D", out, format="feather") == "chromatograms"
+    table = pa.ipc.open_file(out).read_all()
+    assert table.num_rows == 3451
+    assert table.num_columns == 6
+
+    out = str(tmp_path / "uv.parquet")
+    assert convert("./tests/X3346.D/dad1.uv", out) == "uv"
+    assert pq.read_table(out).shape == (3443, 106)
+
+
+def test_detect_format():
+    assert detect_format("./tests/OpenLab") == "openlab_lc"
+    assert detect_format("./tests/X3346.D/Report.pdf") is None
+
+
+def openlab_dir(tmp_path, with_lc=True):
+    folder = tmp_path / "openlab"
+    folder.mkdir()
+    if with_lc:
+        shutil.copy("./tests/OpenLab/MeOH_20240719_100ul_DAD1A.cdf", folder)
+    write_spectra_file(folder / "run_MS1_spectra.cdf", [3, 0, 5, 2], "Negative Polarity", 1)
+    write_spectra_file(folder / "run_MS2_spectra.cdf", [4, 4, 1], "Positive Polarity", 2)
+    return str(folder)
+
+
+def test_convert_openlab_folder(tmp_path):
+    folder = openlab_dir(tmp_path)
+    out = str(tmp_path / "run.parquet")
+    assert convert(folder, out) == "openlab"
+
+    lc = pq.read_table(out)
+    assert lc.column_names == ["RetentionTime", "DetectorSignal", "wavelength"]
+    meta = json.loads(lc.schema.metadata[b"binary_parser"])
+    assert meta["attributes"]["MeOH_20240719_100ul_DAD1A.cdf"]["detector_unit"] == "mAU"
+
+    ms = pq.read_table(ms_output(out))
+    assert ms.num_rows == 19
+    assert ms["polarity"].to_pylist() == ["-"] * 10 + ["+"] * 9
+    meta = json.loads(ms.schema.metadata[b"binary_parser"])
+    assert sorted(meta["attributes"]) == ["run_MS1_spectra.cdf", "run_MS2_spectra.cdf"]
+
+
+def test_convert_spectra_folder(tmp_path):
+    folder = openlab_dir(tmp_path, with_lc=False)
+    out = str(tmp_path / "ms.arrow")
+    assert convert(folder, out, format="arrow") == "openlab_ms"
+    assert pa.ipc.open_file(out).read_all().num_rows == 19
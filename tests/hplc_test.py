@@ -1,4 +1,17 @@
+import glob
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
 import binary_parser as bp
+import binary_parser.helper.decimate as decimate
+import binary_parser.helper.parser_hplc as ph
+import binary_parser.helper.synthetic as sy
+from binary_parser.hplc import UVCube, read_uv_cube
+from binary_parser.hplc.read_files import (
+    check_identical_lists, plot_uv, read_file_info, read_time, read_uv_arrays
+)
 
 
 def test_read_chromatograms():
@@ -6,3 +19,177 @@ def test_read_chromatograms():
     df = bp.read_chromatograms(path)
     assert df.size == 20706
     assert df.shape == (3451, 6)
+
+
+def test_decode_delta_compression():
+    for file_path in glob.glob("./tests/**/*.ch", recursive=True):
+        expected = ph.DeltaCompression(file_path, 0x1800)
+        res = ph.decode_delta_compression(file_path, 0x1800)
+        assert res.dtype == expected.dtype
+        assert np.array_equal(res, expected)
+
+
+def test_decode_uv():
+    for file_path in glob.glob("./tests/**/*.uv", recursive=True):
+        uv = ph.UVClass(file_path)
+        time, wavelengths, data = ph.decode_uv(file_path)
+        assert np.array_equal(time, uv.getTime())
+        assert np.array_equal(wavelengths, uv.getWavelengths())
+        assert np.array_equal(data, uv.getData())
+
+
+def test_read_chromatograms_workers():
+    path = "./tests/X3346.D"
+    df = bp.read_chromatograms(path)
+    assert df.equals(bp.read_chromatograms(path, workers=2))
+    with ThreadPoolExecutor(2) as executor:
+        assert df.equals(bp.read_chromatograms(path, executor=executor))
+
+
+def test_ch_file():
+    file_path = "./tests/X3346.D/dad1A.ch"
+    ch = ph.ChFile(file_path)
+    assert ch.signal == read_file_info(file_path)
+    assert [ch.start_time, ch.end_time] == list(ph.readTime(file_path, 0x11A))
+    assert ch.intercept == ph.readDouble(file_path, 4724)
+    assert ch.slope == ph.readDouble(file_path, 4732)
+    assert np.array_equal(ch.raw_data(), ph.DeltaCompression(file_path, ch.data_offset))
+
+
+def test_write_ch_file(tmp_path):
+    file_path = str(tmp_path / "dad1A.ch")
+    values = np.cumsum(np.random.default_rng(0).integers(-50000, 50000, 9000))
+    sy.write_ch_file(file_path, values, 1.0, 4.0, signal=230, escape_frequency=0.05, seed=1)
+    assert np.array_equal(ph.DeltaCompression(file_path, 0x1800), values)
+    ch = ph.ChFile(file_path)
+    assert np.array_equal(ch.raw_data(), values)
+    assert (ch.signal, ch.start_time, ch.end_time) == (230, 1.0, 4.0)
+
+
+def test_write_uv_file(tmp_path):
+    file_path = str(tmp_path / "dad1.uv")
+    data = np.random.default_rng(0).integers(-100000, 100000, (40, 21))
+    time = np.arange(40) / 10
+    sy.write_uv_file(file_path, time, np.arange(200, 242, 2), data, escape_frequency=0.1, seed=1)
+    uv = ph.UVClass(file_path)
+    assert np.array_equal(uv.getData(), data)
+    assert np.allclose(uv.getTime(), time)
+    assert np.array_equal(uv.getWavelengths(), np.arange(200, 242, 2))
+
+
+def test_decode_uv_chunks(tmp_path):
+    # escapes and a second, wider wavelength grid across chunk boundaries
+    file_path = str(tmp_path / "dad1.uv")
+    rng = np.random.default_rng(0)
+    first = rng.integers(-100000, 100000, (30, 21))
+    second = rng.integers(-100000, 100000, (40, 26))
+    with open(file_path, "wb") as f:
+        f.write(sy._uv_header(70))
+        f.write(sy._uv_scans(np.arange(30) / 10, first, sy._wavelength_range(np.arange(200, 242, 2)), 0.1, rng))
+        f.write(sy._uv_scans(np.arange(30, 70) / 10, second, sy._wavelength_range(np.arange(190, 242, 2)), 0.1, rng))
+    for chunk_words in (10, 100, 1 << 16):
+        time, wavelengths, data = ph.decode_uv(file_path, chunk_words=chunk_words)
+        assert np.allclose(time, np.arange(70) / 10)
+        assert np.array_equal(data[:30, :21], first)
+        assert not data[:30, 21:].any()
+        assert np.array_equal(data[30:, np.argsort(wavelengths)], second)
+
+
+def test_generate_run(tmp_path):
+    for name, signal in (("dad1A.ch", 210), ("dad1B.ch", 254)):
+        sy.generate_ch_file(str(tmp_path / name), points=9000, signal=signal, chunk=4000)
+    df = bp.read_chromatograms(str(tmp_path))
+    assert df.shape == (9000, 3)
+    assert sorted(df.columns) == ["Wavelength_210", "Wavelength_254", "time"]
+
+    file_path = str(tmp_path / "dad1.uv")
+    sy.generate_uv_file(file_path, scans=300, chunk_scans=128)
+    time, wavelengths, data = ph.decode_uv(file_path)
+    assert data.shape == (300, 105)
+    assert np.array_equal(data, ph.UVClass(file_path).getData())
+
+
+def test_minmax_indices():
+    y = np.random.default_rng(0).normal(size=100001)
+    y[[10, 5000, 99999]] = [40, -30, 50]
+    idx = decimate.minmax_indices(y, 1000)
+    assert len(idx) <= 1000
+    assert np.all(np.diff(idx) > 0)
+    assert {10, 5000, 99999} <= set(idx.tolist())
+    assert np.array_equal(decimate.minmax_indices(y[:500], 1000), np.arange(500))
+
+
+def test_plot_decoded_data():
+    df = bp.read_chromatograms("./tests/X3346.D")
+    fig = bp.plot_chromatograms(df, max_points=500, show=False)
+    assert len(fig.data) == 5
+    assert all(len(trace.x) <= 500 for trace in fig.data)
+
+    time, wavelengths, data = read_uv_arrays("./tests/X3346.D/dad1.uv")
+    fig = plot_uv((time, wavelengths, data), max_points=20000, show=False)
+    z = np.asarray(fig.data[0].z)
+    assert z.size <= 20000
+    assert z.shape[1] == len(wavelengths)
+    assert np.isclose(z.mean(), (data / data.max()).mean(), rtol=0.01)
+
+
+def test_uv_cube():
+    cube = read_uv_cube("./tests/X3346.D/dad1.uv")
+    assert cube.data.shape == (3443, 105)
+    chromatogram = cube.chromatogram_at(254.4)
+    assert np.shares_memory(chromatogram, cube.data)
+    assert np.array_equal(chromatogram, cube.data[:, list(cube.wavelengths).index(254)])
+    assert cube.chromatogram_at([210, 254]).shape == (3443, 2)
+    assert np.shares_memory(cube.spectrum_at(cube.time[10] + 1e-4), cube.data)
+    assert np.array_equal(cube.spectrum_at(cube.time[10]), cube.data[10])
+    assert np.allclose(cube.band(250, 254), (cube.data[:, 30] + 2 * cube.data[:, 31] + cube.data[:, 32]))
+    for start, stop in ((254, 254), (254.5, 255.5)):
+        with pytest.raises(ValueError, match="Less than two wavelengths"):
+            cube.band(start, stop)
+    normalised = cube.normalised()
+    assert normalised.raw is cube.raw  # no copy of the matrix
+    assert normalised.max() == 1.0
+    assert np.array_equal(normalised.chromatogram_at(254), chromatogram / cube.max())
+    assert np.array_equal(normalised.spectrum_at(cube.time[10]), cube.data[10] / cube.max())
+    assert np.allclose(normalised.band(250, 254), cube.band(250, 254) / cube.max())
+    assert normalised.normalised().norm == normalised.norm
+
+    df = cube.to_dataframe()
+    assert df.shape == (3443, 106)
+    assert df.columns[0] == "time"
+    assert np.array_equal(df["Wavelength_254"], chromatogram / cube.max())
+
+
+def test_uv_cube_duplicate_labels():
+    cube = UVCube(np.array([0.2, 0.1]), np.array([190.0, 190.5, 200.0]), np.arange(6.0).reshape(2, 3))
+    df = cube.to_dataframe(normalise=False)
+    assert df.columns.tolist() == ["time", "Wavelength_190", "Wavelength_200"]
+    assert df["time"].tolist() == [0.1, 0.2]
+    assert df["Wavelength_190"].tolist() == [3.5, 0.5]
+
+
+def test_ch_follower(tmp_path):
+    values = np.cumsum(np.random.default_rng(0).integers(-50000, 50000, 10000))
+    sy.write_ch_file(str(tmp_path / "full.ch"), values, escape_frequency=0.02, seed=1)
+    with open(tmp_path / "full.ch", "rb") as f:
+        data = f.read()
+
+    file_path = tmp_path / "dad1A.ch"
+    file_path.write_bytes(b"")
+    follower = ph.ChFollower(str(file_path))
+    res = []
+    for size in list(range(0, len(data), 2999)) + [len(data)]:
+        file_path.write_bytes(data[:size])
+        res.append(follower.poll())
+    assert np.array_equal(np.concatenate(res), values)
+    assert follower.points == len(values)
+    assert len(follower.poll()) == 0
+
+
+def test_check_identical_lists():
+    files = sorted(glob.glob("./tests/X3346.D/*.ch"))
+    times = [read_time(f, 3451) for f in files]
+    assert check_identical_lists(times)
+    assert not check_identical_lists([times[0], times[0][:-1]])
+    assert check_identical_lists([[1.0, 2.0], [1.0, 2.0]])
+    assert not check_identical_lists([])
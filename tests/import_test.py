@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+
+def run(code):
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+
+
+def test_import_is_lazy():
+    loaded = run(
+        "import sys, binary_parser; "
+        "print(*[m in sys.modules for m in ('plotly', 'netCDF4', 'pandas')])"
+    )
+    assert loaded == ["False", "False", "False"]
+
+
+def test_readers_load_on_use():
+    loaded = run(
+        "import sys, binary_parser as bp; "
+        "bp.read_chromatograms('./tests/X3346.D'); "
+        "print(*[m in sys.modules for m in ('plotly', 'netCDF4')]); "
+        "bp.read_lc('./tests/OpenLab'); "
+        "print('netCDF4' in sys.modules, 'read_ms' in dir(bp))"
+    )
+    assert loaded == ["False", "False", "True", "True"]
@@ -1,8 +1,24 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import netCDF4 as nc
+import numpy as np
+
 import binary_parser.openlab as bp
+import binary_parser.openlab.dataset_cache as dc
+from binary_parser.openlab.openlab import MSScans
+from binary_parser.helper.synthetic import write_spectra_file
+from binary_parser.helper.xic import XICIndex, xic_index
 
 path = "./tests/OpenLab/"
 
 
+def spectra_dir(tmp_path):
+    write_spectra_file(tmp_path / "run_MS1_spectra.cdf", [3, 0, 5, 2], "Negative Polarity", 1)
+    write_spectra_file(tmp_path / "run_MS2_spectra.cdf", [4, 4, 1], "Positive Polarity", 2)
+    return str(tmp_path)
+
+
 def test_read_attr():
     attr = bp.read_attr(path)
     assert attr.shape == (12, 49)
@@ -24,3 +40,118 @@ def test_read_ms():
     assert ms[0].shape == (1358778, 3)
     assert ms[1].shape == (1324471, 3)
 
+
+
+def test_read_lc_workers():
+    data = bp.read_lc(path)
+    assert data.equals(bp.read_lc(path, workers=2))
+
+
+def test_read_lc_threads_small_cache(monkeypatch):
+    # eviction must not close datasets other threads are still reading
+    monkeypatch.setattr(bp.openlab._datasets, "maxsize", 2)
+    data = bp.read_lc(path)
+    with ThreadPoolExecutor(8) as executor:
+        for _ in range(5):
+            assert data.equals(bp.read_lc(path, executor=executor))
+    assert not bp.openlab._datasets._datasets
+
+
+def test_read_ms_opens_each_file_once(tmp_path, monkeypatch):
+    ms_path = spectra_dir(tmp_path)
+    opened = []
+    open_dataset = nc.Dataset
+
+    def dataset(file_path, *args, **kwargs):
+        opened.append(os.path.basename(file_path))
+        return open_dataset(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(dc.nc, "Dataset", dataset)
+    ms = bp.read_ms(ms_path)
+    assert sorted(opened) == ["run_MS1_spectra.cdf", "run_MS2_spectra.cdf"]
+    assert [df.shape for df in ms] == [(10, 3), (9, 3)]
+
+
+def test_read_ms_scans(tmp_path):
+    ms_path = spectra_dir(tmp_path)
+    scans = bp.read_ms_scans(os.path.join(ms_path, "run_MS1_spectra.cdf"))
+    assert scans.point_counts().tolist() == [3, 0, 5, 2]
+    normalised = scans.normalise()
+    for i in [0, 2, 3]:
+        start, stop = scans.offsets[i], scans.offsets[i + 1]
+        assert np.isclose(normalised.intensities[start:stop].max(), 100)
+    df = normalised.to_dataframe()
+    assert df.columns.tolist() == ["mz", "intensities", "time"]
+    assert df["time"].tolist() == [0] * 3 + [1 / 60] * 5 + [1.5 / 60] * 2
+
+
+def test_iter_ms_scans(tmp_path):
+    file_path = os.path.join(spectra_dir(tmp_path), "run_MS1_spectra.cdf")
+    expected = bp.read_ms_scans(file_path).normalise()
+    chunks = list(bp.iter_ms_scans(file_path, scans_per_chunk=3))
+    assert [len(c) for c in chunks] == [3, 1]
+    assert np.array_equal(np.concatenate([c.intensities for c in chunks]), expected.intensities)
+    assert np.array_equal(np.concatenate([c.time for c in chunks]), expected.time)
+
+    # long integer intensities are normalised as floats
+    file_path = str(tmp_path / "run_MS3_spectra.cdf")
+    write_spectra_file(file_path, [3, 0, 5, 2], intensity_type="i4")
+    raw = bp.read_ms_scans(file_path)
+    chunks = list(bp.iter_ms_scans(file_path, scans_per_chunk=3))
+    intensities = np.concatenate([c.intensities for c in chunks])
+    assert np.array_equal(intensities, raw.normalise().intensities)
+    assert np.allclose(intensities, normalised_by_formula(raw))
+
+
+def normalised_by_formula(scans):
+    """Intensities scaled per scan with 100 / maximum, like the original read_ms."""
+    return np.concatenate([
+        scans.intensities[start:stop] * (100 / scans.intensities[start:stop].max())
+        for start, stop in zip(scans.offsets[:-1], scans.offsets[1:]) if stop > start
+    ])
+
+
+def test_normalise_integer_intensities(tmp_path):
+    file_path = str(tmp_path / "run_MS1_spectra.cdf")
+    for intensity_type in ("i2", "i4"):
+        write_spectra_file(file_path, [3, 0, 5, 2], intensity_type=intensity_type)
+        raw = bp.read_ms_scans(file_path)
+        assert raw.intensities.dtype.kind == "i"
+        normalised = raw.normalise()
+        assert normalised.intensities.dtype == np.float64
+        assert np.allclose(normalised.intensities, normalised_by_formula(raw))
+
+    scans = MSScans(np.array([1.0, 2.0]), np.array([10, 30], dtype=np.int32),
+                       np.array([0, 2]), np.array([0.0]))
+    assert np.allclose(scans.normalise().intensities, [100 / 3, 100])
+
+
+def test_read_ms_polarity(tmp_path):
+    ms_path = spectra_dir(tmp_path)
+    both = bp.read_ms(ms_path)
+    assert [df.attrs["polarity"] for df in both] == ["-", "+"]
+
+    positive = bp.read_ms(ms_path, polarity="positive")
+    assert len(positive) == 1
+    assert positive[0].equals(both[1])
+    assert len(bp.read_ms(ms_path, polarity="-", files=["run_MS2_spectra.cdf"])) == 0
+    assert bp.read_ms(ms_path, workers=2)[0].equals(both[0])
+
+
+def test_xic(tmp_path):
+    ms_path = spectra_dir(tmp_path)
+    scans = bp.read_ms_scans(os.path.join(ms_path, "run_MS1_spectra.cdf")).normalise()
+    targets = [300.0, 500.0, 800.0]
+    res = XICIndex.from_ms_scans(scans).xic(targets, tol=[100, 50, 200])
+    assert res.shape == (3, 4)
+
+    df = scans.to_dataframe()
+    for row, (mz, tol) in zip(res, zip(targets, [100, 50, 200])):
+        for i in range(len(scans)):
+            points = df["time"] == scans.time[i]
+            window = points & (df["mz"] >= mz - tol) & (df["mz"] <= mz + tol)
+            assert np.isclose(row[i], df["intensities"][window].sum())
+
+    # the empty second scan has no rows in the DataFrame
+    negative = xic_index(bp.read_ms(ms_path), polarity="-")
+    assert np.allclose(negative.xic(targets, [100, 50, 200]), res[:, [0, 2, 3]])
@@ -0,0 +1,109 @@
+import struct
+
+import numpy as np
+import pytest
+
+import binary_parser.helper.parser_xray as px
+from binary_parser.xray import read_raw, read_raw_index
+
+
+def write_raw(file_path, ranges, wl1=1.5406, wl2=1.54439, version=b"RAW1.01"):
+    """
+    Write a RAW version 3 file: 712 byte file header, then per range a 304
+    byte header, a supplementary header and the float32 intensities.
+    ranges are (start_2theta, step_size, intensities, supplementary_size).
+    """
+    header = bytearray(712)
+    header[:len(version)] = version
+    struct.pack_into("<I", header, 12, len(ranges))
+    struct.pack_into("<dd", header, 624, wl1, wl2)
+    out = bytes(header)
+    for start, step, intensities, supplementary_size in ranges:
+        range_header = bytearray(304)
+        struct.pack_into("<II", range_header, 0, 304, len(intensities))
+        struct.pack_into("<d", range_header, 16, start)
+        struct.pack_into("<d", range_header, 176, step)
+        struct.pack_into("<I", range_header, 256, supplementary_size)
+        out += bytes(range_header) + bytes(supplementary_size)
+        out += np.asarray(intensities, dtype="<f4").tobytes()
+    with open(file_path, "wb") as f:
+        f.write(out)
+
+
+def test_read_raw(tmp_path):
+    file_path = str(tmp_path / "scan.raw")
+    intensities = np.arange(50, dtype=np.float32) * 1.5
+    write_raw(file_path, [(7.0, 0.02, intensities, 40)])
+
+    index = read_raw_index(file_path)
+    assert (index.version, index.wl1, index.wl2) == ("RAW1.01", 1.5406, 1.54439)
+    assert len(index.ranges) == 1
+    raw_range = index.ranges[0]
+    assert (raw_range.steps, raw_range.start_2theta, raw_range.step_size) == (50, 7.0, 0.02)
+    assert raw_range.data_offset == 0x420
+    assert np.allclose(raw_range.two_theta(), 7.0 + np.arange(50) * 0.02)
+    assert np.array_equal(read_raw(file_path), intensities)
+
+
+def test_read_raw_ranges(tmp_path):
+    file_path = str(tmp_path / "scan.raw")
+    first = np.linspace(0, 1, 10, dtype=np.float32)
+    second = np.linspace(5, 9, 7, dtype=np.float32)
+    write_raw(file_path, [(10.0, 0.1, first, 0), (20.0, 0.05, second, 40)])
+
+    index = read_raw_index(file_path)
+    assert [r.data_offset for r in index.ranges] == [712 + 304, 712 + 304 + 40 + 304 + 40]
+    assert index.ranges[1].start_2theta == 20.0
+    assert np.array_equal(read_raw(file_path, 0), first)
+    assert np.array_equal(read_raw(file_path, 1), second)
+
+
+def test_read_raw_unsupported(tmp_path):
+    file_path = str(tmp_path / "scan.raw")
+    write_raw(file_path, [(7.0, 0.02, np.zeros(5), 40)], version=b"RAW4.00")
+    with pytest.raises(ValueError, match="Unsupported RAW file version"):
+        read_raw_index(file_path)
+
+    # a version 3 file cut off inside the header
+    with open(file_path, "wb") as f:
+        f.write(b"RAW1.01" + bytes(100))
+    with pytest.raises(ValueError):
+        read_raw_index(file_path)
+
+
+def test_map_values(tmp_path):
+    file_path = str(tmp_path / "values.bin")
+    doubles = np.arange(6, dtype="<f8") / 4
+    floats = np.arange(5, dtype="<f4") * 3
+    ints = np.array([1, -2, 1 << 30, -(1 << 31)], dtype=">i4")
+    with open(file_path, "wb") as f:
+        f.write(b"head" + doubles.tobytes() + floats.tobytes() + ints.tobytes())
+
+    mapped = px.map_doubles(file_path, 4, 6)
+    assert isinstance(mapped, np.memmap)
+    assert not mapped.flags.writeable
+    assert mapped.dtype == np.dtype("<f8")
+    assert np.array_equal(mapped, doubles)
+
+    assert np.array_equal(px.map_floats(file_path, 52, 5), floats)
+    assert px.map_floats(file_path, 52, 5).dtype == np.dtype("<f4")
+    assert np.array_equal(px.map_int32(file_path, 72), ints)  # count=None: until the end
+    assert px.map_int32(file_path, 72).dtype == np.dtype(">i4")
+    assert len(px.map_doubles(file_path, 4)) == 10  # 84 bytes after the offset
+
+    for empty in (px.map_floats(file_path, 88), px.map_doubles(file_path, 4, 0)):
+        assert len(empty) == 0
+        assert not empty.flags.writeable
+    with pytest.raises(ValueError):
+        px.map_floats(file_path, 52, 100)
+
+
+def test_read_int32(tmp_path):
+    file_path = str(tmp_path / "values.bin")
+    ints = np.array([7, -1, 123456789], dtype=">i4")
+    with open(file_path, "wb") as f:
+        f.write(b"\x00\x00" + ints.tobytes())
+    values = px.read_int32(file_path, 2, 3)
+    assert values.dtype == np.int32
+    assert values.tolist() == [7, -1, 123456789]
+    assert px.read_int32(file_path, 2, 0).tolist() == []